@@ -0,0 +1,229 @@
+'''
+Reproducible benchmarks for the searchers in search.py on the 8-puzzle of eight.py.
+
+A corpus of instances is generated from a fixed seed and stratified by optimal
+solution length, every searcher is run on it (the informed ones once with each
+heuristic of eight.EightPuzzle), and the mean expansions, effective branching
+factor, solution length, time and peak memory are reported for each depth.
+
+    python benchmark.py --save baseline.json       # record a baseline
+    python benchmark.py --compare baseline.json    # exit 1 on a regression
+
+A searcher regresses when its expansions go up against the baseline. Times are
+the least of --repeat runs of each instance, and are only compared with
+--check-time: a searcher is then also a regression when its time goes up by more
+than --threshold and by more than --floor seconds, as wall times of a few
+milliseconds or less vary more than that from run to run. Without --check-time,
+such slowdowns are printed but do not fail the comparison.
+'''
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+
+from eight import EightPuzzle
+from search import (InstrumentedProblem, ara_star_search, astar_search, beam_search, best_first_graph_search,
+                    bidirectional_search, breadth_first_graph_search, depth_first_graph_search,
+                    frontier_breadth_first_search, frontier_uniform_cost_search, heuristic_caches,
+                    ida_star_search, iterative_deepening_search, random_sliding_puzzle,
+                    recursive_best_first_search, sma_star_search, uniform_cost_search)
+from utils import print_table
+
+GOAL = "012345678"
+HEURISTICS = ('h_disabled', 'h_mismatched_tiles', 'h_manhattan_distance')
+
+Searcher = namedtuple('Searcher', 'name search informed')
+
+
+def last_solution(pairs):
+    '''The node of the last (node, bound) pair that ara_star_search yields: its best solution.'''
+    node = None
+    for node, bound in pairs:
+        pass
+    return node
+
+
+SEARCHERS = [
+    Searcher('breadth_first_graph_search', lambda p, h: breadth_first_graph_search(p), False),
+    Searcher('depth_first_graph_search', lambda p, h: depth_first_graph_search(p), False),
+    Searcher('iterative_deepening_search', lambda p, h: iterative_deepening_search(p), False),
+    Searcher('uniform_cost_search', lambda p, h: uniform_cost_search(p), False),
+    Searcher('frontier_breadth_first_search', lambda p, h: frontier_breadth_first_search(p), False),
+    Searcher('frontier_uniform_cost_search', lambda p, h: frontier_uniform_cost_search(p), False),
+    Searcher('greedy_best_first_graph_search', lambda p, h: best_first_graph_search(p, h), True),
+    Searcher('astar_search', astar_search, True),
+    # astar_search breaks ties in f first in, first out; the other policies, to compare
+    *[Searcher('astar_search_tie_' + tie, lambda p, h, tie=tie: astar_search(p, h, tie=tie), True)
+      for tie in ('lifo', 'high_g', 'low_h')],
+    Searcher('ida_star_search', lambda p, h: ida_star_search(p, h, p.h_delta), True),
+    Searcher('recursive_best_first_search', recursive_best_first_search, True),
+    Searcher('sma_star_search', sma_star_search, True),
+    # run to the end, when weight has come down to 1 and the solution is optimal
+    Searcher('ara_star_search', lambda p, h: last_solution(ara_star_search(p, h)), True),
+    # MM's h is problem.h in both directions; expansions count the backward search too
+    Searcher('bidirectional_search', lambda p, h: bidirectional_search(p), True),
+    # beam_search's f is g + problem.h, and run_one makes problem.h the chosen heuristic
+    Searcher('beam_search_10', lambda p, h: beam_search(p, 10), True),
+    Searcher('beam_search_100', lambda p, h: beam_search(p, 100), True),
+    Searcher('astar_search_max_frontier_100', lambda p, h: astar_search(p, h, max_frontier=100), True),
+]
+
+
+def optimal_length(initial, goal=GOAL):
+    '''The length of an optimal solution, found with A* and Manhattan distance.'''
+    problem = EightPuzzle(initial, goal)
+    return len(astar_search(problem, problem.h_manhattan_distance).solution())
+
+
+def make_corpus(depths, per_depth, seed=0):
+    '''Return {depth: [initial, ...]} with per_depth distinct instances of each optimal
+    solution length in depths, drawn with search.random_sliding_puzzle from a fixed seed.'''
+    rng = random.Random(seed)
+    goal = tuple(map(int, GOAL))
+    corpus = {}
+    for depth in depths:
+        instances = corpus[depth] = []
+        while len(instances) < per_depth:
+            initial = ''.join(map(str, random_sliding_puzzle(3, depth, goal, rng)))
+            if initial not in instances:
+                instances.append(initial)
+    return corpus
+
+
+def effective_branching_factor(generated, depth):
+    '''Return b such that a uniform tree of the given depth with branching factor b
+    has generated + 1 nodes, i.e. 1 + b + b^2 + ... + b^depth == generated + 1.'''
+    if depth == 0:
+        return 0.0
+    low, high = 0.0, float(max(generated, 1))
+    for _ in range(60):
+        b = (low + high) / 2
+        if sum(b ** i for i in range(depth + 1)) < generated + 1:
+            low = b
+        else:
+            high = b
+    return round((low + high) / 2, 4)
+
+
+def run_one(searcher, heuristic, initial, trace_memory=False):
+    '''Solve one instance and return its InstrumentedProblem, the node found, the time
+    and the peak memory traced (0 unless trace_memory).'''
+    # a fresh start for every run: h values cached by an earlier run would flatter this one
+    heuristic_caches.clear()
+    puzzle = EightPuzzle(initial, GOAL, heuristic) if heuristic else EightPuzzle(initial, GOAL)
+    problem = InstrumentedProblem(puzzle, trace_memory=trace_memory)
+    h = problem.h if heuristic else None
+    start = time.perf_counter()
+    node = searcher.search(problem, h)
+    seconds = time.perf_counter() - start
+    peak = problem.stats().get('peak_memory', 0)
+    problem.close()
+    return problem, node, seconds, peak
+
+
+def run(corpus, searchers=SEARCHERS, heuristics=HEURISTICS, memory=True, jsonl=None, repeat=3):
+    '''Run the searchers over the corpus and return {key: metrics}, where key is
+    "searcher/heuristic/depth". The time of an instance is the least of repeat runs
+    without tracemalloc, and with memory=True the peak memory is taken on another,
+    traced run. Each instance's InstrumentedProblem.stats() are appended to the
+    jsonl file, if given.'''
+    results = {}
+    for searcher in searchers:
+        for heuristic in (heuristics if searcher.informed else [None]):
+            for depth, instances in sorted(corpus.items()):
+                rows = []
+                for initial in instances:
+                    problem, node, seconds, _ = run_one(searcher, heuristic, initial)
+                    for _ in range(repeat - 1):
+                        seconds = min(seconds, run_one(searcher, heuristic, initial)[2])
+                    peak = run_one(searcher, heuristic, initial, True)[3] if memory else 0
+                    if jsonl:
+                        problem.write_jsonl(jsonl, searcher=searcher.name, heuristic=heuristic,
+                                            depth=depth, initial=initial, peak_memory=peak)
+                    succs, states = problem.succs, problem.states
+                    if problem.backward is not None:
+                        succs, states = succs + problem.backward.succs, states + problem.backward.states
+                    rows.append((succs, effective_branching_factor(states, depth),
+                                 len(node.solution()) if node else None, seconds, peak))
+                key = '{}/{}/{}'.format(searcher.name, heuristic or '-', depth)
+                solved = [row[2] for row in rows if row[2] is not None]
+                results[key] = dict(expansions=sum(row[0] for row in rows) / len(rows),
+                                    branching_factor=round(sum(row[1] for row in rows) / len(rows), 4),
+                                    solution_length=sum(solved) / len(solved) if solved else None,
+                                    solved=len(solved), seconds=sum(row[3] for row in rows) / len(rows),
+                                    peak_memory=max(row[4] for row in rows))
+    return results
+
+
+def report(results):
+    '''Print the results as a table.'''
+    header = ['Searcher/heuristic/depth', 'expansions', 'b*', 'length', 'seconds', 'peak memory']
+    print_table([[key, round(r['expansions'], 1), r['branching_factor'], r['solution_length'],
+                  '{:.4f}'.format(r['seconds']), r['peak_memory']] for key, r in results.items()], header)
+
+
+def regressions(results, baseline, threshold=0.25, floor=0.005, check_time=False):
+    '''Return a list of messages, one for each searcher in both results and baseline whose
+    expansions went up, or, with check_time, whose time went up by more than threshold
+    (a fraction) and by more than floor seconds.'''
+    messages = []
+    for key, old in baseline.items():
+        new = results.get(key)
+        if new is None:
+            continue
+        if new['expansions'] > old['expansions']:
+            messages.append('{}: expansions {} -> {}'.format(key, old['expansions'], new['expansions']))
+        if (check_time and new['seconds'] > old['seconds'] * (1 + threshold) and
+                new['seconds'] - old['seconds'] > floor):
+            messages.append('{}: seconds {:.4f} -> {:.4f}'.format(key, old['seconds'], new['seconds']))
+    return messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depths', type=int, nargs='+', default=[4, 8, 12])
+    parser.add_argument('--per-depth', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--searchers', nargs='+', default=[s.name for s in SEARCHERS],
+                        choices=[s.name for s in SEARCHERS])
+    parser.add_argument('--heuristics', nargs='+', default=list(HEURISTICS), choices=HEURISTICS)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the tracemalloc run that measures peak memory')
+    parser.add_argument('--jsonl', help='append per-instance statistics to this file')
+    parser.add_argument('--save', help='write the results to this baseline file')
+    parser.add_argument('--compare', help='compare the results with this baseline file')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='time each instance this many times and keep the least')
+    parser.add_argument('--check-time', action='store_true',
+                        help='count slowdowns as regressions, not only more expansions')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed fractional increase in time before it counts as a regression')
+    parser.add_argument('--floor', type=float, default=0.005,
+                        help='increases in time of at most this many seconds are ignored')
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.depths, args.per_depth, args.seed)
+    searchers = [s for s in SEARCHERS if s.name in args.searchers]
+    results = run(corpus, searchers, args.heuristics, args.memory, args.jsonl, args.repeat)
+    report(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(dict(seed=args.seed, corpus=corpus, results=results), f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        messages = regressions(results, baseline['results'], args.threshold, args.floor, args.check_time)
+        for message in messages:
+            print('REGRESSION', message)
+        for message in regressions(results, baseline['results'], args.threshold, args.floor, True):
+            if message not in messages:
+                print('SLOWER', message)
+        return 1 if messages else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+'''
+Unit tests for benchmark.py
+'''
+
+import unittest
+
+from benchmark import (SEARCHERS, effective_branching_factor, make_corpus, optimal_length,
+                       regressions, run)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_corpus(self):
+        corpus = make_corpus([2, 5], 2, seed=1)
+        self.assertEqual(corpus, make_corpus([2, 5], 2, seed=1))
+        for depth, instances in corpus.items():
+            self.assertEqual(len(instances), 2)
+            self.assertEqual([optimal_length(initial) for initial in instances], [depth, depth])
+
+    def test_effective_branching_factor(self):
+        self.assertAlmostEqual(effective_branching_factor(14, 3), 2.0, places=3)
+        self.assertAlmostEqual(effective_branching_factor(5, 5), 1.0, places=3)
+        self.assertEqual(effective_branching_factor(7, 0), 0.0)
+
+    def test_run_and_regressions(self):
+        searchers = [s for s in SEARCHERS if s.name in ('breadth_first_graph_search', 'astar_search')]
+        results = run(make_corpus([3], 1), searchers, ['h_manhattan_distance'], memory=False)
+        self.assertEqual(sorted(results), ['astar_search/h_manhattan_distance/3',
+                                           'breadth_first_graph_search/-/3'])
+        self.assertTrue(all(r['solution_length'] == 3 for r in results.values()))
+        traced = run(make_corpus([3], 1), searchers[:1], [], memory=True)
+        self.assertGreater(traced['breadth_first_graph_search/-/3']['peak_memory'], 0)
+        self.assertEqual(regressions(results, results), [])
+        baseline = {key: dict(r, expansions=r['expansions'] - 1, seconds=r['seconds'] / 2)
+                    for key, r in results.items()}
+        self.assertEqual(len(regressions(results, baseline)), 2)
+        self.assertEqual(len(regressions(results, baseline, threshold=10, floor=0, check_time=True)), 2)
+        self.assertEqual(len(regressions(results, baseline, threshold=0.5, floor=0, check_time=True)), 4)
+        # doubling a time of well under the floor is noise
+        self.assertEqual(len(regressions(results, baseline, threshold=0.5, floor=1, check_time=True)), 2)
+
+    def test_optimal_searchers(self):
+        names = ('ara_star_search', 'bidirectional_search', 'frontier_breadth_first_search',
+                 'frontier_uniform_cost_search')
+        searchers = [s for s in SEARCHERS if s.name in names]
+        results = run(make_corpus([6], 1), searchers, ['h_manhattan_distance'], memory=False)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r['solution_length'] == 6 and r['expansions'] > 0 for r in results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
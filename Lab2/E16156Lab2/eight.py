@@ -41,15 +41,38 @@ TODO 2:
 '''
 
 from search import Problem, astar_search
+from utils import inversions, manhattan_distance
+from collections import namedtuple
+import multiprocessing
 import time
 
 class EightPuzzle(Problem):
     '''This is an AIMA Problem sub-class that implements the traditional 8 puzzle.'''
     
-    def __init__(self, initial, goal):
-        '''This method initializes a standard AIMA search problem for the 8 puzzle.'''
+    # the change in the blank's index made by each action
+    delta = {'u': -3, 'd': 3, 'l': -1, 'r': 1}
+
+    def __init__(self, initial, goal, heuristic='h_disabled'):
+        '''This method initializes a standard AIMA search problem for the 8 puzzle. The
+        heuristic names the method that h() calls.'''
         self.initial = initial
         self.goal = goal
+        # tables[heuristic][tile][i] is what tile (a digit) at position i adds to heuristic
+        allPositions = [(0,0),(0,1),(0,2),(1,0),(1,1),(1,2),(2,0),(2,1),(2,2)]
+        self.tables = {'h_disabled': {}, 'h_mismatched_tiles': {}, 'h_manhattan_distance': {}}
+        for g, tile in enumerate(goal):
+            blank = tile == '0'
+            self.tables['h_disabled'][tile] = [0] * 9
+            self.tables['h_mismatched_tiles'][tile] = [int(not blank and i != g) for i in range(9)]
+            self.tables['h_manhattan_distance'][tile] = [0 if blank else manhattan_distance(allPositions[i], allPositions[g])
+                                                         for i in range(9)]
+        if heuristic not in self.tables:
+            raise ValueError('Unknown heuristic: {}'.format(heuristic))
+        self.heuristic = heuristic
+        # h_values[state] is the value h() gave state; only h() reads or writes it
+        self.h_values = {}
+        if not self.check_solvability(initial):
+            raise ValueError('The goal {} cannot be reached from {}'.format(goal, initial))
         
     def actions(self, state):
         # TODO: Implement a proper actions() method here.
@@ -100,36 +123,62 @@ class EightPuzzle(Problem):
         
         return self.swap(state, zero_pos, next_pos)
     
+    def check_solvability(self, state):
+        '''The goal can be reached from state if and only if the tiles (not the space) are an
+        even number of swaps from their goal order, i.e. their inversions, counted by goal
+        position, are even. On a board 3 wide no move changes that parity.'''
+        position = {tile: i for i, tile in enumerate(self.goal)}
+        return inversions([position[tile] for tile in state if tile != '0']) % 2 == 0
+    
     def goal_test(self, state):
         '''This method determines if the given state is a goal state.'''
         return state == self.goal
-    
+
+    def reversed(self):
+        '''The puzzle from the goal back to the initial state, with its tables built for
+        that goal and the same heuristic.'''
+        return EightPuzzle(self.goal, self.initial, self.heuristic)
+
+    def heuristic_key(self):
+        '''h() depends on the heuristic chosen as well as the goal.'''
+        return self.goal, self.heuristic
+
     def h(self, node):
-        '''This calls the chosen heuristic.'''
-        return self.h_disabled(node);
+        '''This calls the chosen heuristic. A node whose parent's value this method has
+        already computed (it keeps its own values in h_values, not in the node, whose h
+        slot holds whatever h the searcher was given) gets the parent's value plus the
+        change made by the move, instead of a sum over the whole board.'''
+        parent = node.parent
+        value = None if parent is None else self.h_values.get(parent.state)
+        if value is None:
+            value = self.evaluate(self.heuristic, node.state)
+        else:
+            value += self.h_delta(parent.state, node.action)
+        self.h_values[node.state] = value
+        return value
+    
+    def h_delta(self, state, action):
+        '''The change in the chosen heuristic made by applying action to state: only the
+        tile that slides into the blank position moves.'''
+        blank = state.find('0')
+        neighbor = blank + self.delta[action]
+        table = self.tables[self.heuristic][state[neighbor]]
+        return table[blank] - table[neighbor]
+    
+    def evaluate(self, heuristic, state):
+        '''Sum the table of the named heuristic over the tiles of state.'''
+        table = self.tables[heuristic]
+        return sum(table[tile][i] for i, tile in enumerate(state))
     
     def h_disabled(self, node):
         '''This version of h() is disabled (but still admissible because it always underestimates everything).'''
         return 0
     
     def h_mismatched_tiles(self, node):
-        count = 0
-        for i, val in enumerate(node.state):
-            tile = int(val) 
-            if(tile != 0 and i != tile): 
-                count += 1 
-        return count
-        
+        return self.evaluate('h_mismatched_tiles', node.state)
     
     def h_manhattan_distance(self, node):
-
-        allPositions = [(0,0),(0,1),(0,2),(1,0),(1,1),(1,2),(2,0),(2,1),(2,2)]
-        totalDistance = 0
-        for i, val in enumerate(node.state):
-            tile = int(val)
-            if(tile != 0):
-                totalDistance += manhattan_distance(allPositions[i], allPositions[tile])
-        return totalDistance
+        return self.evaluate('h_manhattan_distance', node.state)
     
     def swap(self, state, x, y):
         '''This method swaps the tile values in the two given state coordinates.'''
@@ -137,19 +186,64 @@ class EightPuzzle(Problem):
         result = result.replace(state[y], state[x])
         return result.replace("*", state[y])
 
-            
-goal_state = "012345678"
-# initial_state = "032415678" # 4 steps
-# initial_state = "125634780" # 8 steps
-initial_state = "063712854" # 16 steps
-
-p = EightPuzzle(initial_state, goal_state)
 
-time1 = time.time()
-solution = astar_search(p).solution()
-time2 = time.time()
-print ("solution: " + str(solution))
-print ("steps: " + str(len(solution)))
-print ("time: %0.3f seconds" % (time2 - time1))
+class CountingEightPuzzle(EightPuzzle):
+    '''An EightPuzzle that counts the nodes expanded (the calls of actions()) and does
+    nothing else, so the search is timed without the overhead of InstrumentedProblem.'''
 
+    expansions = 0
 
+    def actions(self, state):
+        self.expansions += 1
+        return EightPuzzle.actions(self, state)
+
+
+BatchResult = namedtuple('BatchResult', 'initial goal solution expansions seconds')
+
+
+def solve(initial, goal="012345678", heuristic='h_manhattan_distance'):
+    '''Solve one instance with A* using the named EightPuzzle heuristic as h (so that it
+    is computed incrementally), and return a BatchResult with the solution (None if there
+    is none), the number of nodes expanded and the wall time in seconds. Raises
+    ValueError if the goal cannot be reached from initial.'''
+    problem = CountingEightPuzzle(initial, goal, heuristic)
+    start = time.perf_counter()
+    node = astar_search(problem)
+    seconds = time.perf_counter() - start
+    return BatchResult(initial, goal, node and node.solution(), problem.expansions, seconds)
+
+
+def _solve_pair(job):
+    '''Pool worker: solve one (initial, goal, heuristic) job. An unsolvable instance gets
+    a BatchResult with no solution rather than stopping the batch.'''
+    initial, goal, heuristic = job
+    if not EightPuzzle(goal, goal).check_solvability(initial):
+        return BatchResult(initial, goal, None, 0, 0.0)
+    return solve(initial, goal, heuristic)
+
+
+def solve_batch(instances, heuristic='h_manhattan_distance', processes=None, chunksize=8):
+    '''Solve an iterable of (initial, goal) pairs on a pool of worker processes (one per
+    core by default), handing them out chunksize at a time. BatchResults are yielded in
+    the order of the instances, each as soon as it (and those before it) are done, so a
+    large batch can be consumed while it is still being solved. Unsolvable instances are
+    not searched; their results have no solution and no expansions.'''
+    jobs = ((initial, goal, heuristic) for initial, goal in instances)
+    if processes == 1:
+        yield from map(_solve_pair, jobs)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(_solve_pair, jobs, chunksize)
+
+
+if __name__ == "__main__":
+    goal_state = "012345678"
+    # initial_state = "032415678" # 4 steps
+    # initial_state = "125634780" # 8 steps
+    initial_state = "063712854" # 16 steps
+
+    result = solve(initial_state, goal_state)
+    solution = result.solution
+    print ("solution: " + str(solution))
+    print ("steps: " + str(len(solution)))
+    print ("time: %0.3f seconds" % result.seconds)
@@ -0,0 +1,140 @@
+"""
+A perfect distance table for the 8-puzzle
+
+The 8-puzzle has 9!/2 = 181,440 states reachable from any goal, few enough to
+record the optimal distance to the goal of every one of them. The table is
+built once by a breadth-first search backwards from the goal, kept as one byte
+per permutation of the nine cells, and can be saved to disk and memory-mapped
+at startup:
+
+    table = DistanceTable.load_or_build('eight.dt', goal=(1, 2, 3, 4, 5, 6, 7, 8, 0))
+    table.distance((1, 2, 3, 4, 5, 6, 0, 7, 8))        # 2
+    table.search(EightPuzzle((1, 2, 3, 4, 5, 6, 0, 7, 8)))
+    table.close()                                        # unmap the file
+
+A loaded table can also be used as a context manager, which closes it.
+
+search() follows the table downhill from the initial state, so an optimal
+solution costs one lookup per neighbour of each state on it, with no search.
+The table is also the perfect heuristic, and an instance may be passed to any
+searcher as h. States are sequences of tile numbers with 0 for the blank, read
+row by row, as in search.EightPuzzle, or digit strings as in eight.EightPuzzle.
+"""
+
+import mmap
+import os
+from collections import deque
+
+from pattern_db import neighbor_cells
+from permutation_rank import rank
+from search import Node
+
+MAGIC = b'E8DT'
+UNKNOWN = 0xFF
+SIZE = 9
+TABLE_LENGTH = 362880  # 9!
+
+
+def tiles(state):
+    """Return state as a tuple of tile numbers; digit strings are converted."""
+    if isinstance(state, str):
+        return tuple(map(int, state))
+    return tuple(state)
+
+
+class DistanceTable:
+    """The optimal number of moves to the goal for every 8-puzzle state, as a
+    byte array indexed by permutation_rank.rank (UNKNOWN for the other parity)."""
+
+    def __init__(self, goal, table, mapping=None):
+        self.goal = tiles(goal)
+        self.table = table
+        self.mapping = mapping  # the mmap behind table, if it was loaded
+
+    def close(self):
+        """Unmap the file a loaded table was read from; the table cannot be used after."""
+        if self.mapping is not None:
+            self.table.release()
+            self.mapping.close()
+            self.mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def build(cls, goal=(1, 2, 3, 4, 5, 6, 7, 8, 0)):
+        """Breadth-first search from the goal, recording the depth of each state."""
+        goal = tiles(goal)
+        neighbors = neighbor_cells(3)
+        table = bytearray([UNKNOWN]) * TABLE_LENGTH
+        table[rank(goal)] = 0
+        frontier = deque([(goal, goal.index(0), 1)])
+        while frontier:
+            state, blank, d = frontier.popleft()
+            for cell in neighbors[blank]:
+                child = list(state)
+                child[blank], child[cell] = child[cell], 0
+                child = tuple(child)
+                i = rank(child)
+                if table[i] == UNKNOWN:
+                    table[i] = d
+                    frontier.append((child, cell, d + 1))
+        return cls(goal, table)
+
+    def distance(self, state):
+        """Return the number of moves from state to the goal, or None if the goal
+        cannot be reached from it."""
+        d = self.table[rank(tiles(state))]
+        return None if d == UNKNOWN else d
+
+    def __call__(self, node):
+        """The exact distance of node.state, so the table can be used as an h function."""
+        return self.distance(node.state)
+
+    def search(self, problem):
+        """Return the goal Node of an optimal solution of problem, found by moving
+        to a neighbour one step closer to the goal at every step, or None if the
+        problem is unsolvable. problem.goal must be this table's goal."""
+        if tiles(problem.goal) != self.goal:
+            raise ValueError('The table was built for goal {}, not {}'.format(self.goal, problem.goal))
+        node = Node(problem.initial)
+        d = self.distance(node.state)
+        if d is None:
+            return None
+        while d:
+            d -= 1
+            node = next(child for child in node.expand(problem) if self.distance(child.state) == d)
+        return node
+
+    def save(self, path):
+        """Write the table to path, after a header holding the goal."""
+        with open(path, 'wb') as file:
+            file.write(MAGIC + bytes(self.goal))
+            file.write(self.table)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a file written by save, so the table is paged in as it is read.
+        The file stays mapped until close() is called."""
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:4] != MAGIC or len(data) != 4 + SIZE + TABLE_LENGTH:
+            data.close()
+            raise ValueError('{} is not an 8-puzzle distance table'.format(path))
+        return cls(tuple(data[4:4 + SIZE]), memoryview(data)[4 + SIZE:], data)
+
+    @classmethod
+    def load_or_build(cls, path, goal=(1, 2, 3, 4, 5, 6, 7, 8, 0)):
+        """Load the table at path if it was built for goal; otherwise build it and
+        save it there."""
+        if os.path.exists(path):
+            table = cls.load(path)
+            if table.goal == tiles(goal):
+                return table
+            table.close()
+        table = cls.build(goal)
+        table.save(path)
+        return table
@@ -0,0 +1,50 @@
+'''
+Unit tests for eight_table.py
+'''
+
+import os
+import tempfile
+import unittest
+
+import eight
+from search import EightPuzzle, astar_search
+from eight_table import DistanceTable
+
+
+class TestDistanceTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = DistanceTable.build()
+
+    def test_distance(self):
+        self.assertEqual(self.table.distance((1, 2, 3, 4, 5, 6, 7, 8, 0)), 0)
+        self.assertEqual(self.table.distance((1, 2, 3, 4, 5, 6, 0, 7, 8)), 2)
+        self.assertEqual(self.table.distance((8, 6, 7, 2, 5, 4, 3, 0, 1)), 31)
+        self.assertIsNone(self.table.distance((2, 1, 3, 4, 5, 6, 7, 8, 0)))
+        self.assertEqual(max(d for d in self.table.table if d != 0xFF), 31)
+
+    def test_search(self):
+        for initial in [(7, 1, 5, 8, 3, 6, 0, 2, 4), (8, 7, 5, 2, 0, 6, 3, 1, 4)]:
+            problem = EightPuzzle(initial)
+            node = self.table.search(problem)
+            self.assertTrue(problem.goal_test(node.state))
+            self.assertEqual(len(node.solution()), len(astar_search(problem, problem.h_manhattan).solution()))
+        self.assertRaises(ValueError, EightPuzzle, (2, 1, 3, 4, 5, 6, 7, 8, 0))
+        with self.assertRaises(ValueError):
+            self.table.search(eight.EightPuzzle("063712854", "012345678"))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'eight.dt')
+            self.table.save(path)
+            with DistanceTable.load(path) as loaded:
+                self.assertEqual(loaded.goal, self.table.goal)
+                self.assertEqual(bytes(loaded.table), bytes(self.table.table))
+            self.assertIsNone(loaded.mapping)
+            with DistanceTable.load_or_build(path) as loaded:
+                self.assertEqual(loaded.goal, self.table.goal)
+
+
+if __name__ == '__main__':
+    unittest.main()
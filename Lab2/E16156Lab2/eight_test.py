@@ -7,8 +7,8 @@ Unit tests for eight.py
 @modified-by: trbandara
 '''
 
-from search import Node
-from eight import EightPuzzle
+from search import InstrumentedProblem, Node, astar_search
+from eight import EightPuzzle, solve, solve_batch
 import unittest
 
 class TestEight(unittest.TestCase):
@@ -55,6 +55,44 @@ class TestEight(unittest.TestCase):
         self.assertEqual(self.problem.h_manhattan_distance(Node("120345678")), 2)
         self.assertEqual(self.problem.h_manhattan_distance(Node("123405678")), 6)
         self.assertEqual(self.problem.h_manhattan_distance(Node("724506831")), 18) # Text example, Figure 3.28
+
+    def test_incremental_h(self):
+        for heuristic in ("h_mismatched_tiles", "h_manhattan_distance"):
+            problem = EightPuzzle("724506831", "012345678", heuristic)
+            root = Node("724506831")
+            root.h = problem.h(root)
+            self.assertEqual(root.h, getattr(problem, heuristic)(root))
+            for child in root.expand(problem):
+                self.assertEqual(problem.h(child), getattr(problem, heuristic)(child))
+        self.assertEqual(EightPuzzle("724506831", "012345678").h(Node("724506831")), 0)
+        # a wrapped h fills the nodes' h slots with its own values, which h() must not read
+        problem = EightPuzzle("063712854", "012345678", "h_manhattan_distance")
+        node = astar_search(problem, lambda n: 2 * problem.h(n))
+        self.assertEqual(node.h, 0)
+        for n in node.path():
+            self.assertEqual(n.h, 2 * problem.h_manhattan_distance(n))
+        self.assertRaises(ValueError, EightPuzzle, "012345678", "012345678", "h_unknown")
+
+    def test_solve(self):
+        result = solve("125634780", heuristic='h_mismatched_tiles')
+        self.assertEqual(len(result.solution), 8)
+        problem = InstrumentedProblem(EightPuzzle("125634780", "012345678", 'h_mismatched_tiles'))
+        astar_search(problem)
+        self.assertEqual(result.expansions, problem.succs)
+
+    def test_solve_batch(self):
+        instances = [("032415678", "012345678"), ("125634780", "012345678"), ("063712854", "012345678")]
+        results = list(solve_batch(instances, processes=2, chunksize=1))
+        self.assertEqual([r.initial for r in results], [initial for initial, goal in instances])
+        self.assertEqual([len(r.solution) for r in results], [4, 8, 16])
+
+    def test_unsolvable(self):
+        self.assertFalse(self.problem.check_solvability("021345678"))
+        self.assertTrue(self.problem.check_solvability("724506831"))
+        self.assertRaises(ValueError, solve, "021345678")
+        results = list(solve_batch([("021345678", "012345678"), ("032415678", "012345678")], processes=1))
+        self.assertEqual((results[0].solution, results[0].expansions), (None, 0))
+        self.assertEqual(len(results[1].solution), 4)
         
         
 if __name__ == "__main__":
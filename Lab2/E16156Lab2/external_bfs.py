@@ -0,0 +1,202 @@
+"""
+Breadth-first search with the layers kept on disk
+
+breadth_first_graph_search keeps every state it has seen in memory. Here each
+layer of the search (the states at one depth) is a file of fixed-width binary
+records, sorted and free of duplicates, and memory holds only a buffer of the
+children being generated. When the buffer reaches max_memory bytes it is sorted
+and written out as a run; once the layer is expanded the runs are merged, and
+duplicates are dropped by merging against the last two layers as well. That is
+delayed duplicate detection, and it is complete for problems whose actions can
+be undone (such as the sliding-tile puzzles), where a child of a layer can only
+be in the next layer, the layer itself, or the one before:
+
+    sizes = [count for depth, path, count in external_layers(PatternSpace(4, goal, pattern))]
+    node = external_breadth_first_search(SlidingPuzzle(initial), directory='/scratch/bfs')
+
+States are turned into records by problem.encode and back by problem.decode
+when the problem has them (search.SlidingPuzzle packs the 15-puzzle in 8 bytes);
+otherwise strings are stored as their UTF-8 bytes and sequences of small ints as
+bytes. Layer files are read through mmap.
+"""
+
+import heapq
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+
+from search import Node
+
+RECORD_OVERHEAD = sys.getsizeof(b'') + 8  # a bytes object, and the list slot that holds it
+
+
+def codec(problem):
+    """Return the (encode, decode) pair used for problem's states."""
+    encode = getattr(problem, 'encode', None)
+    decode = getattr(problem, 'decode', None)
+    if encode and decode:
+        return encode, decode
+    if isinstance(problem.initial, str):
+        return str.encode, bytes.decode
+    state_type = type(problem.initial)
+    return bytes, state_type
+
+
+def records(path, width):
+    """Yield the records of the file at path, width bytes each."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        for i in range(0, len(data), width):
+            yield data[i:i + width]
+    finally:
+        data.close()
+
+
+def contains(path, width, record):
+    """Binary search the sorted file at path for record."""
+    if os.path.getsize(path) == 0:
+        return False
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        lo, hi = 0, len(data) // width
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[mid * width:(mid + 1) * width] < record:
+                lo = mid + 1
+            else:
+                hi = mid
+        return data[lo * width:(lo + 1) * width] == record
+    finally:
+        data.close()
+
+
+def write_run(path, buffer):
+    """Sort buffer and write it to path without duplicates."""
+    buffer.sort()
+    last = None
+    with open(path, 'wb') as file:
+        for record in buffer:
+            if record != last:
+                file.write(record)
+                last = record
+
+
+def merge_layer(path, runs, width, previous):
+    """Merge the sorted runs into a layer file at path, leaving out duplicates and
+    the records of the sorted files in previous; return the number written."""
+    older = [records(p, width) for p in previous]
+    heads = [next(it, None) for it in older]
+    count = 0
+    last = None
+    with open(path, 'wb') as file:
+        for record in heapq.merge(*(records(run, width) for run in runs)):
+            if record == last:
+                continue
+            last = record
+            seen = False
+            for i, it in enumerate(older):
+                while heads[i] is not None and heads[i] < record:
+                    heads[i] = next(it, None)
+                seen = seen or heads[i] == record
+            if not seen:
+                file.write(record)
+                count += 1
+    for it in older:
+        it.close()
+    return count
+
+
+def external_layers(problem, directory=None, max_memory=1 << 26, keep_layers=False):
+    """Enumerate the states reachable from problem.initial a layer at a time,
+    yielding (depth, path, count) for each layer file once it is written. Files go
+    in directory (a temporary one, removed at the end, by default); unless
+    keep_layers is true, a layer is deleted once the next two are written, so the
+    path yielded is good until the generator is advanced twice more. max_memory
+    bounds the bytes of children held in memory before a run is written."""
+    encode, decode = codec(problem)
+    start = encode(problem.initial)
+    width = len(start)
+    limit = max(1, max_memory // (width + RECORD_OVERHEAD))
+    temporary = directory is None
+    directory = tempfile.mkdtemp(prefix='bfs-') if temporary else directory
+    os.makedirs(directory, exist_ok=True)
+    layers = [os.path.join(directory, 'layer-0.bin')]
+    try:
+        with open(layers[0], 'wb') as file:
+            file.write(start)
+        depth, count = 0, 1
+        while count:
+            yield depth, layers[-1], count
+            runs, buffer = [], []
+            for record in records(layers[-1], width):
+                state = decode(record)
+                for action in problem.actions(state):
+                    buffer.append(encode(problem.result(state, action)))
+                if len(buffer) >= limit:
+                    runs.append(os.path.join(directory, 'run-{}.bin'.format(len(runs))))
+                    write_run(runs[-1], buffer)
+                    buffer = []
+            if buffer:
+                runs.append(os.path.join(directory, 'run-{}.bin'.format(len(runs))))
+                write_run(runs[-1], buffer)
+                buffer = []
+            depth += 1
+            layers.append(os.path.join(directory, 'layer-{}.bin'.format(depth)))
+            count = merge_layer(layers[-1], runs, width, layers[-3:-1])
+            for run in runs:
+                os.remove(run)
+            if not keep_layers and len(layers) > 3:
+                os.remove(layers[-4])
+        if not keep_layers:
+            for path in layers[-3:]:
+                os.remove(path)
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def external_breadth_first_search(problem, directory=None, max_memory=1 << 26):
+    """Search breadth first with external_layers until a layer holds problem.goal,
+    and return a Node for a shortest path to it, or None if it cannot be reached.
+    The path is traced back through the layer files, which are kept until then:
+    from each state, the child found in the layer before is the one it came from."""
+    encode, decode = codec(problem)
+    goal = encode(problem.goal)
+    width = len(goal)
+    temporary = directory is None
+    directory = tempfile.mkdtemp(prefix='bfs-') if temporary else directory
+    layers = []
+    try:
+        for depth, path, count in external_layers(problem, directory, max_memory, keep_layers=True):
+            layers.append(path)
+            if contains(path, width, goal):
+                break
+        else:
+            return None
+        states = [problem.goal]
+        for path in reversed(layers[:-1]):
+            state = states[-1]
+            states.append(next(child for child in (problem.result(state, action)
+                                                   for action in problem.actions(state))
+                               if contains(path, width, encode(child))))
+        node = Node(problem.initial)
+        for state in reversed(states[:-1]):
+            action = next(action for action in problem.actions(node.state)
+                          if encode(problem.result(node.state, action)) == encode(state))
+            node = node.child_node(problem, action)
+        return node
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+        else:
+            # the layers yielded, and the empty one after them if the goal was not found
+            for depth in range(len(layers) + 1):
+                path = os.path.join(directory, 'layer-{}.bin'.format(depth))
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,48 @@
+'''
+Unit tests for external_bfs.py
+'''
+
+import os
+import tempfile
+import unittest
+
+import eight
+from external_bfs import external_breadth_first_search, external_layers
+from pattern_db import PatternSpace
+from search import EightPuzzle, PackedEightPuzzle, SlidingPuzzle, breadth_first_graph_search
+
+
+class TestExternalBFS(unittest.TestCase):
+
+    def test_layers(self):
+        sizes = [count for depth, path, count in external_layers(SlidingPuzzle((1, 2, 3, 4, 5, 6, 7, 8, 0)),
+                                                                  max_memory=1 << 16)]
+        self.assertEqual(sum(sizes), 181440)
+        self.assertEqual(sizes[:4], [1, 2, 4, 8])
+        self.assertEqual(len(sizes), 32)
+        space = PatternSpace(3, (1, 2, 3, 4, 5, 6, 7, 8, 0), (1, 2, 3))
+        self.assertEqual(sum(count for _, _, count in external_layers(space, max_memory=500)), 9 * 8 * 7 * 6)
+
+    def test_search(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for problem in [SlidingPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)), EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)),
+                            PackedEightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)), eight.EightPuzzle("125340678", "012345678")]:
+                node = external_breadth_first_search(problem, directory, max_memory=4096)
+                self.assertTrue(problem.goal_test(node.state))
+                self.assertEqual(len(node.solution()), len(breadth_first_graph_search(problem).solution()))
+                self.assertEqual(os.listdir(directory), [])
+            problem = SlidingPuzzle((1, 2, 3, 0))
+            problem.goal = bytes((2, 1, 3, 0))
+            self.assertIsNone(external_breadth_first_search(problem, directory))
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_encode(self):
+        problem = SlidingPuzzle((1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 0, 15))
+        self.assertEqual(len(problem.encode(problem.initial)), 8)
+        self.assertEqual(problem.decode(problem.encode(problem.initial)), problem.initial)
+        problem = EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4))
+        self.assertEqual(problem.decode(problem.encode(problem.initial)), problem.initial)
+
+
+if __name__ == '__main__':
+    unittest.main()
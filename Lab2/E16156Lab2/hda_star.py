@@ -0,0 +1,237 @@
+"""
+Hash-distributed A* (HDA*) on several worker processes
+
+Every state has an owner, one of the workers, chosen by a hash of the state.
+Each worker keeps the frontier and the best g of the states it owns and runs A*
+on them; a child owned by another worker is buffered and sent to its owner in
+batches. A goal found by any worker becomes the incumbent, which is broadcast so
+that nobody expands a node with f at or above it:
+
+    node = hda_star_search(SlidingPuzzle(initial), workers=8)
+
+The search is over when every worker is idle (it has nothing under the incumbent
+to expand and its inbox is empty) and every batch sent has been received. That
+is detected by counting (Mattern's four-counter method): each worker counts the
+batches it has sent and received, and the coordinator sends probes in waves,
+which a worker answers with its counts the next time it is idle. Counts taken at
+different times can miss a batch in flight, so one wave is not enough; but if two
+waves in a row give the same totals, with as many batches received as sent, none
+was in flight at the end of the first, and since an idle worker only becomes busy
+by receiving one, the incumbent is optimal (with an admissible h).
+
+Puzzle states (sequences of small ints, such as search.SlidingPuzzle's) are
+hashed by Zobrist hashing: the xor of a random 64-bit key for each (cell, tile).
+"""
+
+import heapq
+import multiprocessing
+import queue
+import random
+import traceback
+import zlib
+from itertools import count
+
+from search import Node
+
+IDLE_WAIT = 0.05  # seconds an idle worker waits on its inbox before checking again
+REPORT_WAIT = 1.0  # seconds the coordinator waits for a report before checking on the workers
+
+
+class ZobristHash:
+    """Hash a sequence of ints below values, of length size, as the xor of a random
+    64-bit key for each (position, value), drawn from a fixed seed."""
+
+    def __init__(self, size, values, seed=0):
+        rng = random.Random(seed)
+        self.keys = [[rng.getrandbits(64) for _ in range(values)] for _ in range(size)]
+
+    def __call__(self, state):
+        h = 0
+        for keys, value in zip(self.keys, state):
+            h ^= keys[value]
+        return h
+
+
+def state_hash(problem):
+    """Return a hash function on problem's states that gives the same value in every
+    process: a ZobristHash for sequences of small ints, else a CRC of the state's repr."""
+    initial = problem.initial
+    try:
+        if len(initial) and all(isinstance(value, int) and 0 <= value < 256 for value in initial):
+            return ZobristHash(len(initial), 256)
+    except TypeError:
+        pass
+    return repr_hash
+
+
+def repr_hash(state):
+    """A CRC of repr(state); unlike hash(), the same in every process."""
+    return zlib.crc32(repr(state).encode())
+
+
+def _worker(index, problem, h, owner_of, workers, batch_size, inboxes, reports):
+    """Run _search, reporting any exception it raises to the coordinator."""
+    try:
+        _search(index, problem, h, owner_of, workers, batch_size, inboxes, reports)
+    except Exception:
+        reports.put(('error', index, traceback.format_exc()))
+
+
+def _search(index, problem, h, owner_of, workers, batch_size, inboxes, reports):
+    """Run A* on the states this worker owns, until told to stop."""
+    inbox = inboxes[index]
+    best = {}  # the least g seen for each owned state
+    frontier = []  # (f, -g, serial, g, state, actions)
+    serial = count()
+    outboxes = [[] for _ in range(workers)]
+    incumbent = float('inf')
+    sent = received = expansions = 0
+    probe = None  # the wave of the probe to answer when next idle
+
+    def add(g, state, actions):
+        if g < best.get(state, float('inf')):
+            best[state] = g
+            f = g + h(Node(state, None, actions[-1] if actions else None, g))
+            if f < incumbent:
+                heapq.heappush(frontier, (f, -g, next(serial), g, state, actions))
+
+    def flush():
+        nonlocal sent
+        for other, batch in enumerate(outboxes):
+            if batch:
+                inboxes[other].put(('nodes', batch))
+                outboxes[other] = []
+                sent += 1
+
+    while True:
+        # read everything waiting, blocking for a while only when there is nothing to do
+        working = bool(frontier) and frontier[0][0] < incumbent
+        try:
+            while True:
+                message = inbox.get(block=not working, timeout=IDLE_WAIT) if not working else inbox.get_nowait()
+                if message[0] == 'nodes':
+                    received += 1
+                    for g, state, actions in message[1]:
+                        add(g, state, actions)
+                elif message[0] == 'incumbent':
+                    incumbent = min(incumbent, message[1])
+                elif message[0] == 'probe':
+                    probe = message[1]
+                else:
+                    reports.put(('stats', index, expansions))
+                    return
+                working = bool(frontier) and frontier[0][0] < incumbent
+        except queue.Empty:
+            pass
+        if not working:
+            flush()
+            if probe is not None:
+                reports.put(('ack', probe, index, sent, received))
+                probe = None
+            continue
+        f, _, _, g, state, actions = heapq.heappop(frontier)
+        if g > best[state]:
+            continue
+        if problem.goal_test(state):
+            incumbent = g
+            reports.put(('solution', g, actions))
+            continue
+        expansions += 1
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            child_g = problem.path_cost(g, state, action, child)
+            other = owner_of(child) % workers
+            if other == index:
+                add(child_g, child, actions + (action,))
+            else:
+                outboxes[other].append((child_g, child, actions + (action,)))
+                if len(outboxes[other]) >= batch_size:
+                    inboxes[other].put(('nodes', outboxes[other]))
+                    outboxes[other] = []
+                    sent += 1
+        if expansions % batch_size == 0:
+            flush()
+
+
+def _report(reports, processes):
+    """Return the next report, raising RuntimeError if a worker failed or died."""
+    while True:
+        try:
+            report = reports.get(timeout=REPORT_WAIT)
+        except queue.Empty:
+            for i, process in enumerate(processes):
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError('HDA* worker {} exited with code {}'.format(i, process.exitcode))
+            continue
+        if report[0] == 'error':
+            raise RuntimeError('HDA* worker {} failed:\n{}'.format(report[1], report[2]))
+        return report
+
+
+def hda_star_search(problem, h=None, workers=None, batch_size=64, stats=None):
+    """Find an optimal solution with A* spread over workers processes (one per core by
+    default), each owning the states that state_hash sends to it. Children for other
+    workers are sent batch_size at a time. Returns the goal node, built by replaying the
+    solution's actions from problem.initial, or None if there is no solution. If stats
+    is a dict, it is given the expansions of each worker, the number of batches sent and
+    the number of waves of probes it took to detect the end.
+    problem and h must be picklable (bound methods of a picklable problem are). If a
+    worker raises an exception, or dies, RuntimeError is raised with its traceback."""
+    h = h or problem.h
+    workers = workers or multiprocessing.cpu_count()
+    owner_of = state_hash(problem)
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    reports = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, daemon=True,
+                                         args=(i, problem, h, owner_of, workers, batch_size, inboxes, reports))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    root = owner_of(problem.initial) % workers
+    inboxes[root].put(('nodes', [(0, problem.initial, ())]))
+    sent, received = [0] * workers, [0] * workers
+    incumbent, solution = float('inf'), None
+    wave, acks, last = 0, 0, None  # last: the totals of the wave before
+    finished = False
+    try:
+        for inbox in inboxes:
+            inbox.put(('probe', wave))
+        while True:
+            report = _report(reports, processes)
+            if report[0] == 'solution':
+                if report[1] < incumbent:
+                    incumbent, solution = report[1], report[2]
+                    for inbox in inboxes:
+                        inbox.put(('incumbent', incumbent))
+            elif report[0] == 'ack':
+                _, _, i, sent[i], received[i] = report
+                acks += 1
+                if acks == workers:
+                    # the coordinator counts as having sent that first batch
+                    totals = (sum(sent) + 1, sum(received))
+                    if totals[0] == totals[1] and totals == last:
+                        break
+                    wave, acks, last = wave + 1, 0, totals
+                    for inbox in inboxes:
+                        inbox.put(('probe', wave))
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        expansions = [0] * workers
+        for _ in range(workers):
+            _, i, expansions[i] = _report(reports, processes)
+        finished = True
+    finally:
+        for process in processes:
+            if not finished:
+                process.terminate()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    if stats is not None:
+        stats.update(expansions=expansions, batches=sum(sent) + 1, waves=wave + 1)
+    if solution is None:
+        return None
+    node = Node(problem.initial)
+    for action in solution:
+        node = node.child_node(problem, action)
+    return node
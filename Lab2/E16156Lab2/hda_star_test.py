@@ -0,0 +1,66 @@
+'''
+Unit tests for hda_star.py
+'''
+
+import os
+import unittest
+
+from hda_star import ZobristHash, hda_star_search, repr_hash, state_hash
+from search import EightPuzzle, SlidingPuzzle, astar_search
+
+
+class TestHDAStar(unittest.TestCase):
+
+    def test_state_hash(self):
+        problem = SlidingPuzzle((1, 2, 3, 4, 5, 6, 0, 7, 8))
+        owner_of = state_hash(problem)
+        self.assertIsInstance(owner_of, ZobristHash)
+        self.assertEqual(owner_of(problem.initial), owner_of(bytes(problem.initial)))
+        self.assertNotEqual(owner_of(problem.initial), owner_of(problem.goal))
+        problem.initial = 'A'
+        self.assertIs(state_hash(problem), repr_hash)
+
+    def test_hda_star_search(self):
+        for initial in [(1, 2, 3, 4, 5, 6, 0, 7, 8), (7, 1, 5, 8, 3, 6, 0, 2, 4)]:
+            problem = EightPuzzle(initial)
+            optimal = astar_search(problem).path_cost
+            for workers in (1, 3):
+                stats = {}
+                node = hda_star_search(problem, problem.h_manhattan, workers=workers, batch_size=8, stats=stats)
+                self.assertTrue(problem.goal_test(node.state))
+                self.assertEqual(node.path_cost, optimal)
+                self.assertEqual(len(stats['expansions']), workers)
+
+    def test_overloaded_workers(self):
+        # more workers than cores, sending every child on its own: many batches are in
+        # flight at once, and none may be left unread when the search stops
+        problem = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        for batch_size in (1, 4):
+            stats = {}
+            node = hda_star_search(problem, problem.h_manhattan, workers=6, batch_size=batch_size, stats=stats)
+            self.assertEqual(node.path_cost, 31)
+            self.assertGreaterEqual(stats['waves'], 2)
+            self.assertGreater(stats['batches'], sum(stats['expansions']) // batch_size // 2)
+
+
+    def test_failed_worker(self):
+        problem = EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4))
+        with self.assertRaises(RuntimeError) as raised:
+            hda_star_search(problem, failing_h, workers=3, batch_size=8)
+        self.assertIn('ZeroDivisionError', str(raised.exception))
+        with self.assertRaisesRegex(RuntimeError, 'exited with code 3'):
+            hda_star_search(problem, exiting_h, workers=2)
+
+
+def failing_h(node):
+    """An h that fails on states with the blank in the centre (a module function, so it pickles)."""
+    return 1 // (node.state[4] != 0)
+
+
+def exiting_h(node):
+    """An h that kills its worker process outright."""
+    os._exit(3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""
+Additive pattern databases for sliding-tile puzzles
+
+A pattern database (PDB) records, for every placement of a chosen group of
+tiles on the board, how many moves of those tiles it takes to bring them all to
+their goal cells. It is built once with a backward breadth-first pass from the
+goal, stored as one byte per placement, and then gives a heuristic by lookup.
+
+When the tiles are split into disjoint groups and only moves of a group's own
+tiles are counted, the values of the groups can be added and the sum is still
+admissible; e.g. the 7-8 partition of the 15-puzzle:
+
+    pdb = AdditivePatternDatabase.build(4, goal, [(1, 2, 3, 4, 5, 6, 7),
+                                                  (8, 9, 10, 11, 12, 13, 14, 15)])
+    pdb.save('fifteen-7-8.pdb')
+    ...
+    with AdditivePatternDatabase.load('fifteen-7-8.pdb') as pdb:   # memory-mapped
+        astar_search(problem, pdb)
+
+States are sequences (tuples, bytes, ...) of tile numbers, 0 for the blank,
+read row by row, as in search.EightPuzzle. The build keeps a byte for every
+placement of the group and position of the blank, so the 8-tile group of the
+15-puzzle needs about 4 GB and a long offline run; its finished table is
+519 MB. The 5-5-5 or 6-6-3 partitions build much faster.
+"""
+
+import mmap
+import struct
+from collections import deque
+
+from permutation_rank import placement_rank
+from search import Problem
+from utils import product
+
+MAGIC = b'APDB'
+UNKNOWN = 0xFF
+
+
+def neighbor_cells(n):
+    """Return, for each cell of an n x n board, the cells adjacent to it."""
+    neighbors = []
+    for cell in range(n * n):
+        row, col = divmod(cell, n)
+        neighbors.append(tuple(r * n + c for r, c in ((row - 1, col), (row + 1, col),
+                                                      (row, col - 1), (row, col + 1))
+                               if 0 <= r < n and 0 <= c < n))
+    return neighbors
+
+
+class PatternDatabase:
+    """The moves needed to bring the tiles of one pattern home, for every
+    placement of those tiles, as a byte array indexed by placement_rank."""
+
+    def __init__(self, n, goal, pattern, table):
+        self.n = n
+        self.goal = tuple(goal)
+        self.pattern = tuple(pattern)
+        self.table = table
+
+    @classmethod
+    def build(cls, n, goal, pattern):
+        """Run a backward 0-1 breadth-first search from the goal over placements
+        of the pattern tiles and the blank. Moving the blank onto a pattern tile
+        costs 1, any other blank move costs 0, so only moves of this pattern's
+        tiles are counted and disjoint patterns can be added."""
+        goal = tuple(goal)
+        size = n * n
+        free = size - len(pattern)
+        neighbors = neighbor_cells(n)
+
+        def slot(cells, blank):
+            # distance holds one byte per placement and position of the blank among
+            # the free cells; the final table keeps the best over the blank
+            return placement_rank(cells, size) * free + blank - sum(1 for c in cells if c < blank)
+
+        distance = bytearray([UNKNOWN]) * (product(range(free + 1, size + 1)) * free)
+        start, blank = tuple(goal.index(tile) for tile in pattern), goal.index(0)
+        distance[slot(start, blank)] = 0
+        frontier = deque([(start, blank, 0)])
+        while frontier:
+            cells, blank, d = frontier.popleft()
+            if distance[slot(cells, blank)] < d:
+                continue
+            for cell in neighbors[blank]:
+                if cell in cells:
+                    moved = tuple(blank if c == cell else c for c in cells)
+                    cost = d + 1
+                else:
+                    moved, cost = cells, d
+                i = slot(moved, cell)
+                if cost < distance[i]:
+                    distance[i] = cost
+                    if cost == d:
+                        frontier.appendleft((moved, cell, cost))
+                    else:
+                        frontier.append((moved, cell, cost))
+        table = bytearray(min(distance[i:i + free]) for i in range(0, len(distance), free))
+        return cls(n, goal, pattern, table)
+
+    def lookup(self, where):
+        """Return the table entry for a state, given as where[tile] == cell."""
+        return self.table[placement_rank([where[tile] for tile in self.pattern], self.n * self.n)]
+
+    def __call__(self, node):
+        """The pattern's distance for node.state, so it can be used as an h function."""
+        return self.lookup(tile_cells(node.state))
+
+
+def tile_cells(state):
+    """Return where such that where[tile] is the cell holding tile in state."""
+    return sorted(range(len(state)), key=state.__getitem__)
+
+
+class PatternSpace(Problem):
+    """The abstraction of a sliding-tile puzzle that tells apart only the tiles of
+    a pattern and the blank: a state is the tuple of their cells, the blank's last,
+    and an action is the cell the blank moves to. It has no goal; it is the space
+    a PatternDatabase is built over, and can be enumerated by external_bfs when
+    that is too big for memory, e.g. the 7-tile patterns of the 15-puzzle, with
+    16!/8! = 518,918,400 states."""
+
+    def __init__(self, n, goal, pattern):
+        goal = tuple(goal)
+        super().__init__(tuple(goal.index(tile) for tile in pattern) + (goal.index(0),))
+        self.neighbors = neighbor_cells(n)
+
+    def actions(self, state):
+        return self.neighbors[state[-1]]
+
+    def result(self, state, cell):
+        blank = state[-1]
+        return tuple(blank if c == cell else c for c in state[:-1]) + (cell,)
+
+
+class AdditivePatternDatabase:
+    """A set of pattern databases over disjoint groups of tiles, whose values
+    are added to give an admissible heuristic. An instance is called with a
+    Node, like any other h function."""
+
+    def __init__(self, databases, mapping=None):
+        self.databases = list(databases)
+        self.mapping = mapping  # the mmap behind the tables, if they were loaded
+
+    def close(self):
+        """Unmap the file loaded databases were read from; they cannot be used after."""
+        if self.mapping is not None:
+            for db in self.databases:
+                db.table.release()
+            self.mapping.close()
+            self.mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def build(cls, n, goal, partition):
+        """Build one PatternDatabase for each group of tiles in partition."""
+        tiles = [tile for pattern in partition for tile in pattern]
+        if 0 in tiles or len(tiles) != len(set(tiles)):
+            raise ValueError('The patterns must be disjoint and must not include the blank')
+        goal = tuple(goal)
+        return cls(PatternDatabase.build(n, goal, pattern) for pattern in partition)
+
+    def __call__(self, node):
+        """Return the sum of the pattern distances of node.state."""
+        where = tile_cells(node.state)
+        return sum(db.lookup(where) for db in self.databases)
+
+    def save(self, path):
+        """Write the databases to path: a header giving the board size, the goal
+        and each pattern with the length of its table, followed by the tables."""
+        first = self.databases[0]
+        with open(path, 'wb') as file:
+            file.write(MAGIC + struct.pack('<BB', first.n, len(self.databases)))
+            file.write(bytes(first.goal))
+            for db in self.databases:
+                file.write(struct.pack('<BQ', len(db.pattern), len(db.table)) + bytes(db.pattern))
+            for db in self.databases:
+                file.write(db.table)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a file written by save; the tables are read from the page
+        cache as they are looked up, rather than copied into memory. The file
+        stays mapped until close() is called."""
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:4] != MAGIC:
+            data.close()
+            raise ValueError('{} is not a pattern database file'.format(path))
+        n, count = struct.unpack_from('<BB', data, 4)
+        offset = 6 + n * n
+        goal = tuple(data[6:offset])
+        headers = []
+        for _ in range(count):
+            k, length = struct.unpack_from('<BQ', data, offset)
+            offset += 9
+            headers.append((tuple(data[offset:offset + k]), length))
+            offset += k
+        databases = []
+        with memoryview(data) as view:
+            for pattern, length in headers:
+                databases.append(PatternDatabase(n, goal, pattern, view[offset:offset + length]))
+                offset += length
+        return cls(databases, data)
@@ -0,0 +1,41 @@
+'''
+Unit tests for pattern_db.py
+'''
+
+import os
+import tempfile
+import unittest
+
+from search import EightPuzzle, Node, astar_search
+from pattern_db import AdditivePatternDatabase, placement_rank
+
+
+class TestPatternDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.goal = (1, 2, 3, 4, 5, 6, 7, 8, 0)
+        self.pdb = AdditivePatternDatabase.build(3, self.goal, [(1, 2, 3, 4), (5, 6, 7, 8)])
+
+    def test_placement_rank(self):
+        ranks = {placement_rank((a, b), 4) for a in range(4) for b in range(4) if a != b}
+        self.assertEqual(ranks, set(range(12)))
+
+    def test_values(self):
+        self.assertEqual(self.pdb(Node(self.goal)), 0)
+        self.assertEqual(self.pdb(Node((1, 2, 3, 4, 5, 6, 0, 7, 8))), 2)
+        self.assertEqual(self.pdb(Node((0, 1, 2, 4, 5, 3, 7, 8, 6))), 4)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'eight.pdb')
+            self.pdb.save(path)
+            with AdditivePatternDatabase.load(path) as loaded:
+                self.assertEqual([db.pattern for db in loaded.databases], [(1, 2, 3, 4), (5, 6, 7, 8)])
+                state = (8, 6, 7, 2, 5, 4, 3, 0, 1)
+                self.assertEqual(loaded(Node(state)), self.pdb(Node(state)))
+                self.assertEqual(len(astar_search(EightPuzzle(state), loaded).solution()), 31)
+            self.assertIsNone(loaded.mapping)
+
+
+if __name__ == "__main__":
+    unittest.main()
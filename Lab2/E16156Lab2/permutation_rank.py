@@ -0,0 +1,84 @@
+"""
+Ranking permutations, and sets of permutations kept as bit arrays
+
+A permutation of range(n) is numbered by its position in lexicographic order,
+0 .. n! - 1, from its Lehmer code: digit i counts the later elements smaller
+than perm[i]. The count is taken with a bit mask of the elements already seen,
+so rank() is linear in n rather than quadratic.
+
+Problems whose states are permutations (the sliding-tile puzzles, with the
+blank as 0) can then keep their explored states as one bit per rank instead of
+a set of tuples:
+
+    explored = PermutationSet(9)                   # 9!/2 bits, about 23 KB
+    breadth_first_graph_search(problem, explored)
+"""
+
+from math import factorial
+
+
+def rank(perm):
+    """Return the lexicographic index of perm, a permutation of range(len(perm))."""
+    return placement_rank(perm, len(perm))
+
+
+def unrank(r, n):
+    """Return the permutation of range(n) whose rank is r."""
+    digits = []
+    for base in range(1, n + 1):
+        r, digit = divmod(r, base)
+        digits.append(digit)
+    remaining = list(range(n))
+    return tuple(remaining.pop(digit) for digit in reversed(digits))
+
+
+def placement_rank(cells, size):
+    """Return the index of an ordered placement of distinct cells, chosen from
+    range(size), in 0 .. size!/(size - len(cells))! - 1."""
+    seen = 0
+    r = 0
+    for i, cell in enumerate(cells):
+        # cells below this one, less those already placed, are left to choose from
+        r = r * (size - i) + cell - bin(seen & ((1 << cell) - 1)).count('1')
+        seen |= 1 << cell
+    return r
+
+
+class PermutationSet:
+    """A set of permutations of range(n) with one bit for each, usable as the
+    explored set of a graph search. With half=True (the default) a member is
+    numbered by the position of 0 (the blank) and the rank of the other
+    elements halved: the two orders of those that share a rank // 2 differ by a
+    swap of two tiles, so only one of them can be reached by sliding moves from
+    a given start, and the set needs n!/2 bits. Use half=False for permutations
+    that are not sliding-tile states.
+    key, if given, maps a member to its permutation, e.g. a digit string to a
+    tuple of ints."""
+
+    def __init__(self, n, key=None, half=True):
+        self.half = half
+        self.block = factorial(n - 1) // 2
+        self.bits = bytearray((factorial(n) // (2 if half else 1)) // 8 + 1)
+        self.key = key
+        self.count = 0
+
+    def index(self, perm):
+        if self.key:
+            perm = self.key(perm)
+        if not self.half:
+            return rank(perm)
+        return perm.index(0) * self.block + (rank([tile - 1 for tile in perm if tile]) >> 1)
+
+    def add(self, perm):
+        i = self.index(perm)
+        mask = 1 << (i & 7)
+        if not self.bits[i >> 3] & mask:
+            self.bits[i >> 3] |= mask
+            self.count += 1
+
+    def __contains__(self, perm):
+        i = self.index(perm)
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self):
+        return self.count
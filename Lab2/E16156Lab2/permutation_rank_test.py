@@ -0,0 +1,35 @@
+'''
+Unit tests for permutation_rank.py
+'''
+
+import itertools
+import unittest
+
+from permutation_rank import PermutationSet, placement_rank, rank, unrank
+
+
+class TestPermutationRank(unittest.TestCase):
+
+    def test_rank_is_lexicographic(self):
+        perms = list(itertools.permutations(range(5)))
+        self.assertEqual([rank(p) for p in perms], list(range(len(perms))))
+        self.assertEqual([unrank(r, 5) for r in range(len(perms))], perms)
+
+    def test_placement_rank(self):
+        placements = list(itertools.permutations(range(6), 3))
+        self.assertEqual([placement_rank(p, 6) for p in placements], list(range(len(placements))))
+
+    def test_permutation_set(self):
+        explored = PermutationSet(4, key=lambda s: tuple(map(int, s)))
+        explored.add('0123')
+        explored.add('0123')
+        self.assertIn('0123', explored)
+        self.assertNotIn('1023', explored)
+        self.assertEqual(len(explored), 1)
+        full = PermutationSet(4, half=False)
+        full.add((0, 1, 2, 3))
+        self.assertNotIn((0, 1, 3, 2), full)
+
+
+if __name__ == '__main__':
+    unittest.main()
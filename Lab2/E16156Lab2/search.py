@@ -6,8 +6,14 @@ then create problem instances and solve them with calls to the various search
 functions.
 """
 
+import bisect
+import copy
+import itertools
+import json
 import sys
-from collections import deque
+import time
+import tracemalloc
+from collections import OrderedDict, deque
 
 from utils import *
 
@@ -61,6 +67,20 @@ class Problem:
         and related algorithms try to maximize this value."""
         raise NotImplementedError
 
+    def heuristic_key(self):
+        """Return what the value of h on a state depends on, besides the code of h:
+        problems with equal keys share a heuristic_cache. The default is the goal;
+        override this if h also depends on other attributes of the problem."""
+        return self.goal
+
+    def reversed(self):
+        """Return the problem of getting from the goal back to the initial state, which
+        bidirectional_search searches backward. The default is a copy with initial and
+        goal swapped; override this if anything else was computed from the goal."""
+        backward = copy.copy(self)
+        backward.initial, backward.goal = self.goal, self.initial
+        return backward
+
 
 # ______________________________________________________________________________
 
@@ -73,7 +93,11 @@ class Node:
     the total path_cost (also known as g) to reach the node. Other functions
     may add an f and h value; see best_first_graph_search and astar_search for
     an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    subclass this class.
+    Nodes use __slots__ rather than a per-instance __dict__, so the f and h
+    values have reserved slots; bytes_per_node() reports the resulting size."""
+
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth', 'f', 'h')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
@@ -130,6 +154,24 @@ class Node:
         return hash(self.state)
 
 
+def bytes_per_node(node=None, include_state=False):
+    """Return the number of bytes a search Node takes, for sizing a search
+    before it is run. The f and h values are counted once they are set; the
+    state is only counted if include_state is true, since it is often shared
+    with (or interned by) the problem."""
+    if node is None:
+        node = Node(None, Node(None), None, 0)
+        node.f = node.h = 0.0
+    size = sys.getsizeof(node)
+    for slot in ('f', 'h'):
+        value = getattr(node, slot, None)
+        if isinstance(value, float):
+            size += sys.getsizeof(value)
+    if include_state:
+        size += sys.getsizeof(node.state)
+    return size
+
+
 # ______________________________________________________________________________
 
 
@@ -213,7 +255,7 @@ def depth_first_tree_search(problem):
     return None
 
 
-def depth_first_graph_search(problem):
+def depth_first_graph_search(problem, explored=None):
     """
     [Figure 3.7]
     Search the deepest nodes in the search tree first.
@@ -221,55 +263,91 @@ def depth_first_graph_search(problem):
     The argument frontier should be an empty queue.
     Does not get trapped by loops.
     If two paths reach a state, only use the first one.
+    explored, if given, is an empty set-like object (add and in) to use in
+    place of a set, such as a permutation_rank.PermutationSet.
     """
     frontier = [(Node(problem.initial))]  # Stack
+    frontier_states = {problem.initial}  # The states on the stack, for O(1) membership tests
 
-    explored = set()
+    explored = set() if explored is None else explored
     while frontier:
         node = frontier.pop()
+        frontier_states.remove(node.state)
         if problem.goal_test(node.state):
             return node
         explored.add(node.state)
-        frontier.extend(child for child in node.expand(problem)
-                        if child.state not in explored and child not in frontier)
+        for child in node.expand(problem):
+            if child.state not in explored and child.state not in frontier_states:
+                frontier.append(child)
+                frontier_states.add(child.state)
     return None
 
 
-def breadth_first_graph_search(problem):
+def breadth_first_graph_search(problem, explored=None):
     """[Figure 3.11]
     Note that this function can be implemented in a
     single line as below:
     return graph_search(problem, FIFOQueue())
+    explored may be given as in depth_first_graph_search.
     """
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
     frontier = deque([node])
-    explored = set()
+    frontier_states = {node.state}  # The states in the queue, for O(1) membership tests
+    explored = set() if explored is None else explored
     while frontier:
         node = frontier.popleft()
+        frontier_states.remove(node.state)
         explored.add(node.state)
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
+            if child.state not in explored and child.state not in frontier_states:
                 if problem.goal_test(child.state):
                     return child
                 frontier.append(child)
+                frontier_states.add(child.state)
     return None
 
 
-def best_first_graph_search(problem, f, display=False):
+# How best_first_graph_search orders nodes of equal f: the tie function of its
+# IndexedPriorityQueue (given the memoized f), and whether later insertions go first
+tie_breaking = {
+    'fifo': (None, False),
+    'lifo': (None, True),
+    'high_g': (lambda f: lambda node: -node.path_cost, False),
+    'low_h': (lambda f: lambda node: node.h if hasattr(node, 'h') else f(node) - node.path_cost, False),
+}
+
+
+def best_first_graph_search(problem, f, display=False, explored=None, max_frontier=None, tie='fifo'):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+    The frontier is an IndexedPriorityQueue, so checking whether a state is
+    on the frontier, and lowering its f value, do not scan the whole queue.
+    explored may be given as in depth_first_graph_search.
+    With max_frontier, the frontier never holds more than max_frontier nodes between
+    expansions: each time an expansion takes it over, it is cut back to its best
+    three quarters of max_frontier, which costs O(log n) per node amortized. The
+    search is then neither complete nor optimal, as the pruned nodes are only found
+    again if they are reached by another path.
+    tie picks which of the nodes with the least f is expanded first: 'fifo' (the
+    default) the one queued first, 'lifo' the one queued last, 'high_g' the deepest
+    (the highest path cost), or 'low_h' the one with the least h (its h slot, or else
+    f - g), which is the same as 'high_g' when f = g + h. On problems with many equal f values, such
+    as the 8-puzzle, the last two reach the goal in the last f layer far sooner."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
-    frontier = PriorityQueue('min', f)
+    if tie not in tie_breaking:
+        raise ValueError('Unknown tie-breaking policy: {}'.format(tie))
+    tie_fn, lifo = tie_breaking[tie]
+    frontier = IndexedPriorityQueue('min', f, tie_fn and tie_fn(f), lifo)
     frontier.append(node)
-    explored = set()
+    explored = set() if explored is None else explored
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
@@ -282,42 +360,158 @@ def best_first_graph_search(problem, f, display=False):
                 frontier.append(child)
             elif child in frontier:
                 if f(child) < frontier[child]:
-                    del frontier[child]
+                    # Appending an equal node replaces the queued one (decrease-key)
                     frontier.append(child)
+        if max_frontier is not None and len(frontier) > max_frontier:
+            frontier.prune(max_frontier - max_frontier // 4)
     return None
 
 
-def uniform_cost_search(problem, display=False):
+def uniform_cost_search(problem, display=False, explored=None):
     """[Figure 3.14]"""
-    return best_first_graph_search(problem, lambda node: node.path_cost, display)
+    return best_first_graph_search(problem, lambda node: node.path_cost, display, explored)
+
+
+def used_operators(problem):
+    """Return a function of (state, action, next_state) giving the names of the operator
+    from state to next_state and of the one back, for frontier search. They are actions
+    if problem can reverse() them, and otherwise the states they lead to, which serves
+    for problems like GraphProblem where an action is the state it leads to."""
+    if hasattr(problem, 'reverse'):
+        return lambda state, action, next_state: (action, problem.reverse(action))
+    return lambda state, action, next_state: (next_state, state)
+
+
+def frontier_search(problem, start, goal_test, unit_cost=False, relay_depth=None):
+    """Best-first search by path cost (or by depth, with unit_cost) from start, keeping
+    no explored set (Korf's frontier search). Each state on the frontier records the
+    operators that have already reached it, which are not applied when it is expanded;
+    if every action can be undone, that is enough never to generate an expanded state
+    again. Returns (goal state, cost, depth, relay) or None, where relay is the state at
+    relay_depth on the path to the goal; no other part of the path is kept."""
+    operators = used_operators(problem)
+    serial = itertools.count()
+    frontier = [(0, next(serial), start)]
+    # the states on the frontier: [cost, depth, operators used to reach it, relay]
+    open_states = {start: [0, 0, (), start if relay_depth == 0 else None]}
+    while frontier:
+        g, _, state = heapq.heappop(frontier)
+        entry = open_states.get(state)
+        if entry is None or entry[0] < g:
+            continue  # a stale queue entry, for a state since reached more cheaply
+        del open_states[state]
+        _, depth, done, relay = entry
+        if goal_test(state):
+            return state, g, depth, relay
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            forward, back = operators(state, action, child)
+            if forward in done:
+                continue
+            child_g = g + 1 if unit_cost else problem.path_cost(g, state, action, child)
+            child_relay = relay if relay is not None or depth + 1 != relay_depth else child
+            other = open_states.get(child)
+            if other is None:
+                open_states[child] = [child_g, depth + 1, (back,), child_relay]
+                heapq.heappush(frontier, (child_g, next(serial), child))
+            else:
+                other[2] += (back,)
+                if child_g < other[0]:
+                    other[0], other[1], other[3] = child_g, depth + 1, child_relay
+                    heapq.heappush(frontier, (child_g, next(serial), child))
+    return None
 
 
-def depth_limited_search(problem, limit=50):
-    """[Figure 3.17]"""
+def frontier_path(problem, start, goal_test, unit_cost):
+    """Return the states of an optimal path from start to a goal, by frontier search:
+    a first search finds the goal's depth, a second the state half way there, and the
+    two halves are solved the same way (Korf's divide and conquer), so nothing but the
+    frontier is held. The searches break ties alike, so both find the same path."""
+    found = frontier_search(problem, start, goal_test, unit_cost)
+    if found is None:
+        return None
+    goal, _, depth, _ = found
+    if depth <= 1:
+        return [start, goal][-depth - 1:]
+    relay = frontier_search(problem, start, goal_test, unit_cost, depth // 2)[3]
+    return (frontier_path(problem, start, lambda state: state == relay, unit_cost) +
+            frontier_path(problem, relay, lambda state: state == goal, unit_cost)[1:])
+
+
+def frontier_solution(problem, unit_cost):
+    """Return the goal Node of the path frontier_path finds from problem.initial."""
+    path = frontier_path(problem, problem.initial, problem.goal_test, unit_cost)
+    if path is None:
+        return None
+    node = Node(problem.initial)
+    for state in path[1:]:
+        node = node.child_node(problem, action_between(problem, node.state, state))
+    return node
 
-    def recursive_dls(node, problem, limit):
-        if problem.goal_test(node.state):
-            return node
-        elif limit == 0:
-            return 'cutoff'
-        else:
-            cutoff_occurred = False
-            for child in node.expand(problem):
-                result = recursive_dls(child, problem, limit - 1)
-                if result == 'cutoff':
-                    cutoff_occurred = True
-                elif result is not None:
-                    return result
-            return 'cutoff' if cutoff_occurred else None
 
-    # Body of depth_limited_search:
-    return recursive_dls(Node(problem.initial), problem, limit)
+def frontier_breadth_first_search(problem):
+    """Breadth-first search without an explored set, for problems whose actions can
+    all be undone, such as EightPuzzle or a GraphProblem on an undirected graph. Memory
+    grows with the width of the search rather than the number of states seen, at the
+    price of searching about twice over to recover the path; see frontier_search."""
+    return frontier_solution(problem, unit_cost=True)
+
 
+def frontier_uniform_cost_search(problem):
+    """Uniform-cost search without an explored set; see frontier_breadth_first_search."""
+    return frontier_solution(problem, unit_cost=False)
 
-def iterative_deepening_search(problem):
-    """[Figure 3.18]"""
+
+def depth_limited_search(problem, limit=50, table_size=1 << 20):
+    """[Figure 3.17]
+    Depth-first search on an explicit stack, so the depth is not bounded by Python's
+    recursion limit, taking the actions of each node one at a time as it is returned
+    to. A state already on the current path is skipped, and a transposition table of
+    up to table_size states (0 for none) records the shallowest depth each has been
+    reached at, so a state reached again no shallower is not searched again: its
+    subtree was already searched with at least as much of the limit left. Once the
+    table is full, only the depths of states already in it are updated."""
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return node
+    if limit == 0:
+        return 'cutoff'
+    shallowest = {node.state: 0}
+    on_path = {node.state}
+    stack = [(node, iter(problem.actions(node.state)))]
+    cutoff_occurred = False
+    while stack:
+        node, actions = stack[-1]
+        for action in actions:
+            child = node.child_node(problem, action)
+            if child.state in on_path:
+                continue
+            if table_size:
+                seen = shallowest.get(child.state)
+                if seen is not None and seen <= child.depth:
+                    continue
+                if seen is not None or len(shallowest) < table_size:
+                    shallowest[child.state] = child.depth
+            if problem.goal_test(child.state):
+                return child
+            if child.depth == limit:
+                cutoff_occurred = True
+                continue
+            on_path.add(child.state)
+            stack.append((child, iter(problem.actions(child.state))))
+            break
+        else:
+            stack.pop()
+            on_path.discard(node.state)
+    return 'cutoff' if cutoff_occurred else None
+
+
+def iterative_deepening_search(problem, table_size=1 << 20):
+    """[Figure 3.18]
+    Each depth_limited_search starts with an empty transposition table of up to
+    table_size states, as a state's depth is only a bound on work within one limit."""
     for depth in range(sys.maxsize):
-        result = depth_limited_search(problem, depth)
+        result = depth_limited_search(problem, depth, table_size)
         if result != 'cutoff':
             return result
 
@@ -327,170 +521,872 @@ def iterative_deepening_search(problem):
 # Pseudocode from https://webdocs.cs.ualberta.ca/%7Eholte/Publications/MM-AAAI2016.pdf
 
 def bidirectional_search(problem):
-    e = 0
-    if isinstance(problem, GraphProblem):
-        e = problem.find_min_edge()
-    gF, gB = {Node(problem.initial): 0}, {Node(problem.goal): 0}
-    openF, openB = [Node(problem.initial)], [Node(problem.goal)]
-    closedF, closedB = [], []
-    U = np.inf
-
-    def extend(U, open_dir, open_other, g_dir, g_other, closed_dir):
-        """Extend search in given direction"""
-        n = find_key(C, open_dir, g_dir)
-
-        open_dir.remove(n)
-        closed_dir.append(n)
-
-        for c in n.expand(problem):
-            if c in open_dir or c in closed_dir:
-                if g_dir[c] <= problem.path_cost(g_dir[n], n.state, None, c.state):
+    """MM: meet-in-the-middle bidirectional heuristic search. Each direction keeps
+    its open nodes in IndexedPriorityQueues keyed by pr(n) = max(f(n), 2g(n)), by
+    f and by g, and expands the node of least pr (ties to the least g) from the
+    direction whose least pr is smaller, until the best path found through a
+    meeting state, of cost U, is known to be optimal. The backward search runs
+    on problem.reversed(), with initial and goal swapped, so the actions must
+    be reversible (as in an undirected graph or a sliding puzzle) and its h
+    estimates the cost to the initial state. Returns the Node for the goal at
+    the end of the path through the meeting state, or None."""
+    e = problem.find_min_edge() if isinstance(problem, GraphProblem) else 0
+    if problem.goal_test(problem.initial):
+        return Node(problem.initial)
+    backward = problem.reversed()
+
+    class Direction:
+        """The open and closed nodes of the search in one direction."""
+
+        def __init__(self, problem):
+            self.problem = problem
+            h = memoize(problem.h, 'h')
+            self.pr = IndexedPriorityQueue('min', lambda n: (max(n.path_cost + h(n), 2 * n.path_cost), n.path_cost))
+            self.f = IndexedPriorityQueue('min', lambda n: n.path_cost + h(n))
+            self.g = IndexedPriorityQueue('min', lambda n: n.path_cost)
+            self.open = {}  # state -> Node, for the nodes in the three queues
+            self.closed = {}
+            self.add(Node(problem.initial))
+
+        def add(self, node):
+            self.open[node.state] = node
+            for queue in (self.pr, self.f, self.g):
+                queue.append(node)
+
+        def remove(self, node):
+            del self.open[node.state]
+            for queue in (self.pr, self.f, self.g):
+                del queue[node]
+
+        def pop(self):
+            """Move the open node of least priority to the closed set and return it."""
+            node = self.pr.pop()
+            del self.open[node.state], self.f[node], self.g[node]
+            self.closed[node.state] = node
+            return node
+
+    def least(queue):
+        return queue.heap[0][0]
+
+    forward, back = Direction(problem), Direction(backward)
+    U, meeting = np.inf, None
+    while forward.open and back.open:
+        pr_min_f, pr_min_b = least(forward.pr)[0], least(back.pr)[0]
+        C = min(pr_min_f, pr_min_b)
+        if U <= max(C, least(forward.f), least(back.f), least(forward.g) + least(back.g) + e):
+            break
+        here, there = (forward, back) if C == pr_min_f else (back, forward)
+        for c in here.pop().expand(here.problem):
+            known = here.open.get(c.state) or here.closed.get(c.state)
+            if known is not None:
+                if known.path_cost <= c.path_cost:
                     continue
+                if c.state in here.open:
+                    here.remove(known)
+                else:
+                    del here.closed[c.state]
+            here.add(c)
+            other = there.open.get(c.state)
+            if other is not None and c.path_cost + other.path_cost < U:
+                U = c.path_cost + other.path_cost
+                meeting = (c, other) if here is forward else (other, c)
+
+    if meeting is None:
+        return None
+    node, back_node = meeting
+    while back_node.parent is not None:
+        back_node = back_node.parent
+        node = node.child_node(problem, action_between(problem, node.state, back_node.state))
+    return node
 
-                open_dir.remove(c)
 
-            g_dir[c] = problem.path_cost(g_dir[n], n.state, None, c.state)
-            open_dir.append(c)
+def action_between(problem, state, next_state):
+    """Return an action that leads from state to next_state in one step."""
+    for action in problem.actions(state):
+        if problem.result(state, action) == next_state:
+            return action
+    raise ValueError('{} is not a successor of {}'.format(next_state, state))
 
-            if c in open_other:
-                U = min(U, g_dir[c] + g_other[c])
 
-        return U, open_dir, closed_dir, g_dir
+# ______________________________________________________________________________
+# Informed (Heuristic) Search
 
-    def find_min(open_dir, g):
-        """Finds minimum priority, g and f values in open_dir"""
-        # pr_min_f isn't forward pr_min instead it's the f-value
-        # of node with priority pr_min.
-        pr_min, pr_min_f = np.inf, np.inf
-        for n in open_dir:
-            f = g[n] + problem.h(n)
-            pr = max(f, 2 * g[n])
-            pr_min = min(pr_min, pr)
-            pr_min_f = min(pr_min_f, f)
 
-        return pr_min, pr_min_f, min(g.values())
+greedy_best_first_graph_search = best_first_graph_search
 
-    def find_key(pr_min, open_dir, g):
-        """Finds key in open_dir with value equal to pr_min
-        and minimum g value."""
-        m = np.inf
-        node = Node(-1)
-        for n in open_dir:
-            pr = max(g[n] + problem.h(n), 2 * g[n])
-            if pr == pr_min:
-                if g[n] < m:
-                    m = g[n]
-                    node = n
 
-        return node
+# Greedy best-first search is accomplished by specifying f(n) = h(n).
 
-    while openF and openB:
-        pr_min_f, f_min_f, g_min_f = find_min(openF, gF)
-        pr_min_b, f_min_b, g_min_b = find_min(openB, gB)
-        C = min(pr_min_f, pr_min_b)
 
-        if U <= max(C, f_min_f, f_min_b, g_min_f + g_min_b + e):
-            return U
+# the caches handed out by heuristic_cache, least recently used first, and the
+# options of the Cache made for each (e.g. policy='lfu', maxbytes, ttl or disk)
+heuristic_caches = OrderedDict()
+heuristic_cache_options = dict(maxsize=1 << 16)
+MAX_HEURISTIC_CACHES = 16
+
+
+def heuristic_cache(problem, h=None):
+    """Return the Cache of h values (for h, problem.h by default) shared by every
+    search of a problem with the same heuristic_key(), e.g. the same goal, creating it
+    with heuristic_cache_options if need be. Values are keyed by state, so a state
+    reached by several paths, or in several searches, is evaluated once. Only the
+    MAX_HEURISTIC_CACHES most recently used caches are kept."""
+    h = h or problem.h
+    # InstrumentedProblem.h calls the wrapped problem's h, which is what the values come from
+    while isinstance(getattr(h, '__self__', None), InstrumentedProblem) and h.__func__ is InstrumentedProblem.h:
+        h = h.__self__.problem.h
+    key = (getattr(h, '__func__', h), problem.heuristic_key())
+    try:
+        cache = heuristic_caches.pop(key)
+    except TypeError:
+        return Cache(**heuristic_cache_options)  # an unhashable key: a cache for this search only
+    except KeyError:
+        cache = Cache(**heuristic_cache_options)
+    heuristic_caches[key] = cache
+    if len(heuristic_caches) > MAX_HEURISTIC_CACHES:
+        heuristic_caches.popitem(last=False)
+    return cache
+
+
+def cached_h(problem, h=None, h_cache=False):
+    """Return h (problem.h by default) memoized in each node's h slot and, with
+    h_cache, in the heuristic_cache for the problem."""
+    h = h or problem.h
+    return memoize(h, 'h', key=operator.attrgetter('state'),
+                   cache=heuristic_cache(problem, h) if h_cache else None)
+
+
+def astar_search(problem, h=None, display=False, explored=None, max_frontier=None, h_cache=False, tie='fifo'):
+    """A* search is best-first graph search with f(n) = g(n)+h(n).
+    You need to specify the h function when you call astar_search, or
+    else in your Problem subclass.
+    With h_cache, h is looked up in the heuristic_cache shared by searches of
+    problems with the same heuristic_key() before it is computed; only ask for it
+    when h depends on nothing else about the problem. tie breaks ties in f as in
+    best_first_graph_search."""
+    h = cached_h(problem, h, h_cache)
+    return best_first_graph_search(problem, lambda n: n.path_cost + h(n), display, explored, max_frontier, tie)
+
+
+def ida_star_search(problem, h=None, h_delta=None):
+    """Iterative deepening A*: a series of depth-first searches, each cut off
+    where f = g + h goes over a bound, which starts at h(initial) and is raised
+    to the smallest f that went over it. Only the current path is kept, so the
+    memory used is proportional to the depth of the solution.
+    A problem can speed the search up with optional methods:
+    reverse(action) names the action that undoes action; it is never tried
+    straight after action. copy_state(state) and apply(state, action), together
+    with reverse, let the search work on one mutable copy of the state: each
+    action is applied in place and undone with apply(state, reverse(action)) on
+    the way back, instead of building a new state with result(). (path_cost is
+    then called with the working state in place of both states.)
+    h_delta(state, action), if given, returns h(child) - h(parent) for the child
+    reached from state by action, so h is only computed in full for the initial
+    state. If h is not given, problem.h and problem.h_delta (if any) are used."""
+    if h is None:
+        h, h_delta = problem.h, getattr(problem, 'h_delta', None)
+    reverse = getattr(problem, 'reverse', None)
+    in_place = (reverse is not None and getattr(problem, 'copy_state', None) is not None and
+                getattr(problem, 'apply', None) is not None)
+    actions = []  # the actions on the current path
+    on_path = set()
+
+    def search(state, g, h_value, bound):
+        """Return True if a goal is found within bound, else the smallest f over it."""
+        f = g + h_value
+        if f > bound:
+            return f
+        if problem.goal_test(state):
+            return True
+        minimum = np.inf
+        undo = reverse(actions[-1]) if reverse is not None and actions else None
+        for action in problem.actions(state):
+            if action == undo:
+                continue
+            if h_delta is not None:
+                child_h = h_value + h_delta(state, action)
+            if in_place:
+                problem.apply(state, action)
+                child, cost = state, problem.path_cost(g, state, action, state)
+            else:
+                child = problem.result(state, action)
+                if child in on_path:
+                    continue
+                cost = problem.path_cost(g, state, action, child)
+                on_path.add(child)
+            if h_delta is None:
+                child_h = h(Node(child, None, action, cost))
+            actions.append(action)
+            result = search(child, cost, child_h, bound)
+            if result is True:
+                return True
+            actions.pop()
+            if in_place:
+                problem.apply(state, reverse(action))
+            else:
+                on_path.discard(child)
+            minimum = min(minimum, result)
+        return minimum
 
-        if C == pr_min_f:
-            # Extend forward
-            U, openF, closedF, gF = extend(U, openF, openB, gF, gB, closedF)
+    state = problem.copy_state(problem.initial) if in_place else problem.initial
+    on_path.add(problem.initial)
+    bound = h_value = h(Node(problem.initial))
+    while True:
+        result = search(state, 0, h_value, bound)
+        if result is True:
+            node = Node(problem.initial)
+            for action in actions:
+                node = node.child_node(problem, action)
+            return node
+        if result == np.inf:
+            return None
+        bound = result
+
+
+def sma_star_search(problem, h=None, max_nodes=1000, h_cache=False):
+    """Simplified memory-bounded A* [Russell 1992]: A* on the search tree that holds at
+    most max_nodes nodes in memory. The node with the least f (the deepest, on ties) that
+    has children to generate is expanded next. When memory is full, the worst leaf
+    (greatest f, then shallowest) is forgotten and its f backed up to its parent, which
+    remembers it and regenerates that child when it is again the best on the frontier.
+    f is made monotone along every path, and a node at depth max_nodes - 1, which
+    could not be expanded, gets f = infinity unless it is a goal.
+    The solution is optimal if an optimal one is at most max_nodes - 1 steps long;
+    otherwise it is the best one that fits, and None is returned if none does.
+    max_nodes must be at least 2, room for a node and one child. h_cache is as in
+    astar_search."""
+    if max_nodes < 2:
+        raise ValueError('max_nodes must be at least 2, not {}'.format(max_nodes))
+    h = cached_h(problem, h, h_cache)
+    serial = iter(range(sys.maxsize))
+
+    class Entry:
+        """A node in memory: children maps actions to the entries of its children in
+        memory, and forgotten maps the actions of forgotten children to their f."""
+        __slots__ = ('node', 'parent', 'children', 'forgotten', 'expanded', 'f', 'serial')
+
+        def __init__(self, node, parent, f):
+            self.node, self.parent, self.f, self.serial = node, parent, f, next(serial)
+            self.children, self.forgotten, self.expanded = {}, {}, False
+
+        def key(self):
+            """The least f of the children this entry could (re)generate."""
+            if not self.expanded:
+                return self.f
+            return min(self.forgotten.values(), default=np.inf)
+
+    # open holds the entries with children to generate, best first; leaves holds the
+    # entries with no children in memory, worst first
+    open = IndexedPriorityQueue('min', lambda e: (e.key(), -e.node.depth, e.serial))
+    leaves = IndexedPriorityQueue('min', lambda e: (-e.f, e.node.depth, e.serial))
+
+    def back_up(entry):
+        """Set entry's f, and its ancestors', to the least f of their children."""
+        while entry is not None:
+            f = min(min([child.f for child in entry.children.values()], default=np.inf), entry.key())
+            if f == entry.f:
+                break
+            entry.f = f
+            if entry in leaves:
+                leaves.append(entry)
+            entry = entry.parent
+
+    def child_entry(entry, action, f):
+        child = entry.node.child_node(problem, action)
+        if child.depth >= max_nodes - 1 and not problem.goal_test(child.state):
+            return Entry(child, entry, np.inf)
+        return Entry(child, entry, max(f, child.path_cost + h(child)))
+
+    root = Entry(Node(problem.initial), None, 0)
+    root.f = h(root.node)
+    open.append(root)
+    leaves.append(root)
+    used = 1
+    while open:
+        entry = open.pop()
+        if entry.key() == np.inf:
+            return None
+        node = entry.node
+        if entry.expanded:
+            # regenerate the best forgotten child
+            action = min(entry.forgotten, key=entry.forgotten.get)
+            new = [child_entry(entry, action, entry.forgotten.pop(action))]
+        elif problem.goal_test(node.state):
+            return node
         else:
-            # Extend backward
-            U, openB, closedB, gB = extend(U, openB, openF, gB, gF, closedB)
+            grandparent = node.parent and node.parent.state
+            new = [child_entry(entry, action, entry.f) for action in problem.actions(node.state)]
+            new = [child for child in new if child.node.state != grandparent]
+            entry.expanded = True
+        for child in new:
+            entry.children[child.node.action] = child
+            open.append(child)
+            leaves.append(child)
+        if entry.key() < np.inf:
+            open.append(entry)
+        if entry.children and entry in leaves:
+            del leaves[entry]
+        back_up(entry)
+        used += len(new)
+        # make room, keeping the best new child so that the search moves forward
+        best = min(new, key=lambda e: (e.f, e.serial)) if new else None
+        while used > max_nodes:
+            victim = leaves.pop()
+            if victim is best:
+                victim = leaves.pop()
+                leaves.append(best)
+            if victim in open:
+                del open[victim]
+            parent = victim.parent
+            del parent.children[victim.node.action]
+            parent.forgotten[victim.node.action] = victim.f
+            open.append(parent)
+            if not parent.children:
+                leaves.append(parent)
+            used -= 1
+    return None
+
 
-    return np.inf
+def ara_star_search(problem, h=None, weight=3.0, step=0.5, deadline=None, h_cache=False):
+    """Anytime repairing A* [Likhachev et al. 2003]: a series of weighted A* searches,
+    with f = g + weight * h, that lower weight by step each time until it is 1.
+    This is a generator of (node, bound) pairs: each time a better solution is found,
+    or the bound on an existing one is lowered, it yields the goal node of the best
+    solution so far and a bound on how far that solution's cost can be from optimal,
+    as a factor (1 when it is known to be optimal). Each search keeps the g values
+    and paths found before it; of the states whose g went down after they were expanded,
+    only those are expanded again. deadline, if given, is a time.perf_counter() value;
+    once it passes, the search stops, yielding the best solution first if its bound has
+    improved since the last yield. A caller with a time limit keeps the last pair:
+
+        for node, bound in ara_star_search(problem, deadline=time.perf_counter() + 0.1):
+            best = node
+
+    h_cache is as in astar_search.
+    """
+    h = cached_h(problem, h, h_cache)
+    root = Node(problem.initial)
+    best = {root.state: root}  # the cheapest node found for each state
+    incumbent = root if problem.goal_test(root.state) else None
+    inconsistent = []
+    open = IndexedPriorityQueue('min', lambda n: n.path_cost + weight * h(n))
+    open.append(root)
+    reported = None
+
+    def bound():
+        """The suboptimality bound of the incumbent: weight, or less if the least g + h
+        of the states yet to be expanded shows it."""
+        f = min([n.path_cost + h(n) for n in open] + [n.path_cost + h(n) for n in inconsistent],
+                default=np.inf)
+        if f == np.inf or incumbent.path_cost == 0:
+            return 1
+        return min(weight, incumbent.path_cost / f)
+
+    while True:
+        closed = set()
+        while open and (incumbent is None or incumbent.path_cost > open.heap[0][0]):
+            if deadline is not None and time.perf_counter() >= deadline:
+                if incumbent is not None and bound() != reported:
+                    yield incumbent, bound()
+                return
+            node = open.pop()
+            closed.add(node.state)
+            for child in node.expand(problem):
+                if child.state in best and best[child.state].path_cost <= child.path_cost:
+                    continue
+                best[child.state] = child
+                if problem.goal_test(child.state) and (incumbent is None or
+                                                       child.path_cost < incumbent.path_cost):
+                    incumbent = child
+                if child.state in closed:
+                    inconsistent.append(child)
+                else:
+                    open.append(child)
+        if incumbent is None:
+            return
+        reported = bound()
+        yield incumbent, reported
+        if reported == 1:
+            return
+        # lower the weight, then put the inconsistent states back on the frontier and
+        # reorder it for the new weight
+        weight = max(1.0, min(weight - step, reported))
+        nodes = list(open) + [n for n in inconsistent if best[n.state] is n]
+        open = IndexedPriorityQueue('min', lambda n: n.path_cost + weight * h(n))
+        for node in nodes:
+            open.append(node)
+        inconsistent = []
+
+
+def beam_search(problem, k, f=None, h_cache=False):
+    """Breadth-first search that keeps only the k best nodes of each level, as judged
+    by f (by default g + h, memoized in each node's h slot). Memory is O(k) nodes per
+    level and a level costs k expansions, whatever the branching factor; in exchange the
+    search is neither complete nor optimal, less so the larger k is. States already seen
+    in an earlier level are not kept again. Returns the cheapest goal node of the first
+    level that has one, or None if the beam dies out. h_cache is as in astar_search."""
+    if f is None:
+        h = cached_h(problem, h_cache=h_cache)
+        f = lambda n: n.path_cost + h(n)
+    beam = [Node(problem.initial)]
+    seen = {problem.initial}
+    while beam:
+        goals = [node for node in beam if problem.goal_test(node.state)]
+        if goals:
+            return min(goals, key=lambda n: n.path_cost)
+        children = {}
+        for node in beam:
+            for child in node.expand(problem):
+                if child.state not in seen and (child.state not in children or
+                                                child.path_cost < children[child.state].path_cost):
+                    children[child.state] = child
+        beam = heapq.nsmallest(k, children.values(), key=f)
+        seen.update(node.state for node in beam)
+    return None
 
 
 # ______________________________________________________________________________
-# Informed (Heuristic) Search
+# A* heuristics 
 
+class SlidingPuzzle(Problem):
+    """ The problem of sliding tiles numbered from 1 to n*n - 1 on an n x n board, where
+    one of the squares is a blank (the 15-puzzle for n == 4, the 24-puzzle for n == 5).
+    A state is a bytes object of length n*n whose element i is the tile at cell i, read
+    row by row, and 0 for the blank; the default goal has the tiles in order and the blank
+    last. States may be given as any sequence of ints. The legal moves of the blank and
+    the Manhattan distance of every tile from every cell are tabulated once per problem.
+    Besides Manhattan distance there are two stronger admissible heuristics: linear
+    conflict (the default h) and walking distance. """
+
+    state_type = bytes  # the type of states
+    mutable_type = bytearray  # the type of the copies that apply() changes in place
+    reverse_action = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+
+    # walking distance tables, shared by all problems, keyed by goal configuration
+    walking_distance_tables = {}
+
+    def __init__(self, initial, goal=None, n=None):
+        """ Define goal state and initialize a problem; n defaults to the square root of
+        the length of initial (or goal). Raises ValueError if the goal cannot be reached
+        from initial """
+        if n is None:
+            n = int(round(len(initial if goal is None else goal) ** 0.5))
+        if goal is None:
+            goal = tuple(range(1, n * n)) + (0,)
+        initial = initial if initial is None else self.state_type(initial)
+        super().__init__(initial, self.state_type(goal))
+        self.n = n
+        self.delta = {'UP': -n, 'DOWN': n, 'LEFT': -1, 'RIGHT': 1}
+        # actions_table[blank] lists the actions legal with the blank at cell blank
+        self.actions_table = []
+        for blank in range(n * n):
+            row, col = divmod(blank, n)
+            self.actions_table.append(tuple(action for action, legal in
+                                            (('UP', row > 0), ('DOWN', row < n - 1),
+                                             ('LEFT', col > 0), ('RIGHT', col < n - 1)) if legal))
+        self.goal_cell = [0] * (n * n)
+        for cell, tile in enumerate(self.goal):
+            self.goal_cell[tile] = cell
+        # distances[tile][cell] is the Manhattan distance of tile at cell from its goal cell
+        self.distances = [[0] * (n * n) if tile == 0 else
+                          [abs(cell // n - self.goal_cell[tile] // n) + abs(cell % n - self.goal_cell[tile] % n)
+                           for cell in range(n * n)]
+                          for tile in range(n * n)]
+        if initial is not None and not self.check_solvability(initial):
+            raise ValueError('The goal cannot be reached from {}'.format(tuple(initial)))
 
-greedy_best_first_graph_search = best_first_graph_search
+    def find_blank_square(self, state):
+        """Return the index of the blank square in a given state"""
 
+        return state.index(0)
 
-# Greedy best-first search is accomplished by specifying f(n) = h(n).
+    def actions(self, state):
+        """ Return the actions that can be executed in the given state """
 
+        return self.actions_table[state.index(0)]
 
-def astar_search(problem, h=None, display=False):
-    """A* search is best-first graph search with f(n) = g(n)+h(n).
-    You need to specify the h function when you call astar_search, or
-    else in your Problem subclass."""
-    h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n), display)
+    def result(self, state, action):
+        """ Given state and action, return a new state that is the result of the action.
+        Action is assumed to be a valid action in the state """
+
+        # blank is the index of the blank square
+        blank = state.index(0)
+        new_state = self.mutable_type(state)
 
+        neighbor = blank + self.delta[action]
+        new_state[blank], new_state[neighbor] = new_state[neighbor], new_state[blank]
 
-# ______________________________________________________________________________
-# A* heuristics 
+        return self.state_type(new_state)
+
+    def reverse(self, action):
+        """ Return the action that undoes the given action """
+
+        return self.reverse_action[action]
+
+    def reversed(self):
+        """ Return the puzzle from the goal to the initial state, with its tables built
+        for that goal """
+
+        return type(self)(self.goal, self.initial, self.n)
+
+    def check_solvability(self, state):
+        """ Checks if the goal can be reached from the given state: a move changes the
+        parity of the tiles' inversions (counted in goal order) only when it is vertical
+        on a board of even width, and then it also moves the blank one row, so the
+        parity of inversions plus rows between the blank and its goal row is fixed """
+
+        goal_cell, n = self.goal_cell, self.n
+        parity = inversions([goal_cell[tile] for tile in state if tile])
+        if n % 2 == 0:
+            parity += abs(state.index(0) // n - goal_cell[0] // n)
+        return parity % 2 == 0
+
+    def copy_state(self, state):
+        """ Return a mutable copy of state, for apply() """
+
+        return self.mutable_type(state)
+
+    def apply(self, state, action):
+        """ Apply action to a mutable copy of a state in place """
+
+        blank = state.index(0)
+        neighbor = blank + self.delta[action]
+        state[blank], state[neighbor] = state[neighbor], 0
+
+    def encode(self, state):
+        """ Return state as a fixed-width record for external_bfs: two cells to a byte
+        when every tile fits in four bits (8 bytes for the 15-puzzle), else one """
+
+        if self.n > 4:
+            return bytes(state)
+        cells = bytes(state) + b'\0' * (len(state) % 2)
+        return bytes(high << 4 | low for high, low in zip(cells[::2], cells[1::2]))
+
+    def decode(self, record):
+        """ Return the state that encode() turned into record """
+
+        if self.n > 4:
+            return self.state_type(record)
+        cells = [cell for byte in record for cell in (byte >> 4, byte & 15)]
+        return self.state_type(cells[:self.n * self.n])
+
+    def goal_test(self, state):
+        """ Given a state (or a mutable copy of one), return True if state is a goal state
+        or False, otherwise """
+
+        return self.state_type(state) == self.goal
 
-class EightPuzzle(Problem):
+    def h(self, node):
+        """ Return the heuristic value for a given state: linear conflict """
+
+        return self.h_linear_conflict(node)
+
+    def h_manhattan(self, node):
+        """ Return the sum of the Manhattan distances of the tiles from their goal cells """
+
+        distances = self.distances
+        return sum(distances[tile][cell] for cell, tile in enumerate(node.state))
+
+    def h_manhattan_delta(self, state, action):
+        """ Return the change in h_manhattan made by applying action to state: only the
+        tile that slides into the blank square moves """
+
+        blank = state.index(0)
+        neighbor = blank + self.delta[action]
+        distances = self.distances[state[neighbor]]
+        return distances[blank] - distances[neighbor]
+
+    def h_linear_conflict(self, node):
+        """ Return Manhattan distance plus two moves for each tile that must leave its
+        row (or column) to let the others in it that belong there pass: tiles in their
+        goal line whose goal order is reversed cannot all stay in it. For each line, the
+        tiles that can stay are a longest increasing run of their goal positions. """
+
+        n, state, goal_cell = self.n, node.state, self.goal_cell
+        extra = 0
+        for line in range(n):
+            row = [goal_cell[tile] % n for tile in state[line * n:line * n + n]
+                   if tile and goal_cell[tile] // n == line]
+            col = [goal_cell[tile] // n for tile in state[line::n]
+                   if tile and goal_cell[tile] % n == line]
+            extra += len(row) - longest_increasing(row) + len(col) - longest_increasing(col)
+        return self.h_manhattan(node) + 2 * extra
+
+    def h_walking_distance(self, node):
+        """ Return the walking distance of the state: the vertical moves needed when the
+        tiles are told apart only by their goal row, plus the horizontal moves needed when
+        they are told apart only by their goal column. Both come from a table of all the
+        ways to arrange the tiles by row (or column), built once per goal. """
+
+        n, state, goal_cell = self.n, node.state, self.goal_cell
+        rows, cols = [[0] * n for _ in range(n)], [[0] * n for _ in range(n)]
+        for cell, tile in enumerate(state):
+            if tile:
+                rows[cell // n][goal_cell[tile] // n] += 1
+                cols[cell % n][goal_cell[tile] % n] += 1
+        vertical, horizontal = self.walking_distance_table(False), self.walking_distance_table(True)
+        return (vertical[tuple(map(tuple, rows))] + horizontal[tuple(map(tuple, cols))])
+
+    def walking_distance_table(self, by_column):
+        """ Return {configuration: moves} for every arrangement of the tiles by goal row
+        (or goal column), where configuration[line][g] counts the tiles in row (column)
+        line whose goal row (column) is g; the line holding the blank has n - 1 tiles.
+        The table is built by breadth-first search from the goal configuration. """
+
+        n = self.n
+        blank = self.goal_cell[0] % n if by_column else self.goal_cell[0] // n
+        goal = tuple(tuple((n - (line == blank)) * (g == line) for g in range(n)) for line in range(n))
+        table = self.walking_distance_tables.get(goal)
+        if table is None:
+            table = {goal: 0}
+            frontier = deque([(goal, blank)])
+            while frontier:
+                config, blank = frontier.popleft()
+                d = table[config] + 1
+                for line in (blank - 1, blank + 1):
+                    if not 0 <= line < n:
+                        continue
+                    for g in range(n):
+                        if config[line][g]:
+                            new = [list(counts) for counts in config]
+                            new[line][g] -= 1
+                            new[blank][g] += 1
+                            new = tuple(map(tuple, new))
+                            if new not in table:
+                                table[new] = d
+                                frontier.append((new, line))
+            self.walking_distance_tables[goal] = table
+        return table
+
+
+def longest_increasing(seq):
+    """Return the length of the longest strictly increasing subsequence of seq."""
+    tails = []
+    for x in seq:
+        i = bisect.bisect_left(tails, x)
+        tails[i:i + 1] = [x]
+    return len(tails)
+
+
+def sliding_puzzle_diameter(n, goal):
+    """Return the most moves an optimal solution of the n x n puzzle with the given goal
+    (a sequence of tiles) can take, or None where that is not known: 6 for n == 2, 31
+    for n == 3 (30 when the goal has the blank in the centre), and 80 for n == 4 when
+    the goal has the blank in a corner."""
+    blank = tuple(goal).index(0)
+    if n == 2:
+        return 6
+    if n == 3:
+        return 30 if blank == 4 else 31
+    if n == 4 and blank in (0, 3, 12, 15):
+        return 80
+    return None
+
+
+def random_sliding_puzzle(n=3, depth=None, goal=None, rng=random, distance=None):
+    """Return a random solvable initial state, as a tuple, for the n x n puzzle with the
+    given goal (by default the tiles in order, then the blank). Without depth, all
+    solvable states are equally likely: a random permutation is taken, and two tiles are
+    swapped if it is unsolvable. With depth, the state's optimal solution is exactly depth
+    moves long: a random walk from the goal, never undoing its last move, is measured
+    once it is depth moves long and after each move from then on. Each move changes the
+    optimal length by one, so the walk stops on depth before it can go past it.
+    distance(state) returns the optimal length; it defaults to the length of the
+    ida_star_search solution with linear conflict. On the 8-puzzle,
+    eight_table.DistanceTable.distance is much faster. Raises ValueError if depth
+    is not a non-negative int, or is more than sliding_puzzle_diameter, as no state
+    would do and the walk would never stop."""
+    puzzle = SlidingPuzzle(None, goal, n)
+    if depth is not None:
+        if not isinstance(depth, int) or depth < 0:
+            raise ValueError('depth must be a non-negative int, not {!r}'.format(depth))
+        diameter = sliding_puzzle_diameter(n, puzzle.goal)
+        if diameter is not None and depth > diameter:
+            raise ValueError('No state of the {0}x{0} puzzle is {1} moves from the goal; '
+                             'the most is {2}'.format(n, depth, diameter))
+    if depth is None:
+        state = list(puzzle.goal)
+        rng.shuffle(state)
+        if not puzzle.check_solvability(state):
+            i, j = [cell for cell, tile in enumerate(state) if tile][:2]
+            state[i], state[j] = state[j], state[i]
+        return tuple(state)
+    if distance is None:
+        def distance(state):
+            problem = SlidingPuzzle(state, puzzle.goal, n)
+            return len(ida_star_search(problem, problem.h_linear_conflict).solution())
+    state, undo, steps = puzzle.goal, None, 0
+    while steps < depth or distance(state) != depth:
+        action = rng.choice([action for action in puzzle.actions(state) if action != undo])
+        state, undo, steps = puzzle.result(state, action), puzzle.reverse(action), steps + 1
+    return tuple(state)
+
+
+class EightPuzzle(SlidingPuzzle):
     """ The problem of sliding tiles numbered from 1 to 8 on a 3x3 board, where one of the
     squares is a blank. A state is represented as a tuple of length 9, where  element at
     index i represents the tile number  at index i (0 if it's an empty square) """
 
+    state_type = tuple
+    mutable_type = list
+
     def __init__(self, initial, goal=(1, 2, 3, 4, 5, 6, 7, 8, 0)):
         """ Define goal state and initialize a problem """
-        super().__init__(initial, goal)
+        super().__init__(initial, goal, 3)
+
+    def reversed(self):
+        """ Return the puzzle from the goal to the initial state """
+
+        return type(self)(self.goal, self.initial)
+
+    def h(self, node):
+        """ Return the heuristic value for a given state. Default heuristic function used is 
+        h(n) = number of misplaced tiles """
+
+        return sum(s != g for (s, g) in zip(node.state, self.goal))
+
+    def h_delta(self, state, action):
+        """ Return the change in h (misplaced tiles) made by applying action to state """
+
+        blank = state.index(0)
+        neighbor = blank + self.delta[action]
+        tile, goal = state[neighbor], self.goal
+        return ((tile != goal[blank]) + (goal[neighbor] != 0) -
+                (tile != goal[neighbor]) - (goal[blank] != 0))
+
+
+class PackedEightPuzzle(EightPuzzle):
+    """ The EightPuzzle with each state packed into a single int: cell i holds its tile
+    in bits 4i to 4i+3, and the index of the blank square is cached in bits 36 to 39.
+    The legal actions, and the cells a move swaps, are looked up in tables built once
+    per blank position, so result() is a few shifts and xors instead of a tuple copy.
+    Tuples are packed and unpacked with pack() and unpack(); the actions are the same
+    as EightPuzzle's, so solutions are interchangeable. """
+
+    BLANK_SHIFT = 36
+    CELL_MASK = (1 << BLANK_SHIFT) - 1
+
+    # actions_table[blank] lists the legal actions and moves_table[blank][action] how to
+    # apply one; both are filled in by _eight_puzzle_tables below
+    actions_table = moves_table = None
+
+    # int states cannot be changed in place, so ida_star_search uses result() for them
+    copy_state = apply = None
+
+    def __init__(self, initial, goal=(1, 2, 3, 4, 5, 6, 7, 8, 0)):
+        """ Define goal state and initialize a problem; states may be given as tuples """
+        super().__init__(self.unpack(self.pack(initial)), self.unpack(self.pack(goal)))
+        self.initial, self.goal = self.pack(initial), self.pack(goal)
+
+    @classmethod
+    def pack(cls, state):
+        """Return the int encoding of a tuple state (ints are returned unchanged)"""
+        if isinstance(state, int):
+            return state
+        packed = 0
+        for i, tile in enumerate(state):
+            packed |= tile << (i << 2)
+        return packed | (state.index(0) << cls.BLANK_SHIFT)
+
+    @classmethod
+    def unpack(cls, state):
+        """Return the tuple form of an int encoded state"""
+        return tuple((state >> (i << 2)) & 0xF for i in range(9))
+
+    def encode(self, state):
+        """ Return state as the 5-byte record external_bfs keeps """
+        return state.to_bytes(5, 'big')
+
+    def decode(self, record):
+        """ Return the state that encode() turned into record """
+        return int.from_bytes(record, 'big')
 
     def find_blank_square(self, state):
         """Return the index of the blank square in a given state"""
 
-        return state.index(0)
+        return state >> self.BLANK_SHIFT
 
     def actions(self, state):
-        """ Return the actions that can be executed in the given state.
-        The result would be a list, since there are only four possible actions
-        in any given state of the environment """
-
-        possible_actions = ['UP', 'DOWN', 'LEFT', 'RIGHT']
-        index_blank_square = self.find_blank_square(state)
+        """ Return the actions that can be executed in the given state """
 
-        if index_blank_square % 3 == 0:
-            possible_actions.remove('LEFT')
-        if index_blank_square < 3:
-            possible_actions.remove('UP')
-        if index_blank_square % 3 == 2:
-            possible_actions.remove('RIGHT')
-        if index_blank_square > 5:
-            possible_actions.remove('DOWN')
-
-        return possible_actions
+        return self.actions_table[state >> self.BLANK_SHIFT]
 
     def result(self, state, action):
         """ Given state and action, return a new state that is the result of the action.
         Action is assumed to be a valid action in the state """
 
-        # blank is the index of the blank square
-        blank = self.find_blank_square(state)
-        new_state = list(state)
+        blank_offset, neighbor_offset, blank_move = self.moves_table[state >> self.BLANK_SHIFT][action]
+        tile = (state >> neighbor_offset) & 0xF
+        return state ^ (tile << blank_offset) ^ (tile << neighbor_offset) ^ blank_move
 
-        delta = {'UP': -3, 'DOWN': 3, 'LEFT': -1, 'RIGHT': 1}
-        neighbor = blank + delta[action]
-        new_state[blank], new_state[neighbor] = new_state[neighbor], new_state[blank]
+    def check_solvability(self, state):
+        """ Checks if the given state is solvable """
 
-        return tuple(new_state)
+        return super().check_solvability(self.unpack(self.pack(state)))
 
     def goal_test(self, state):
         """ Given a state, return True if state is a goal state or False, otherwise """
 
         return state == self.goal
 
-    def check_solvability(self, state):
-        """ Checks if the given state is solvable """
+    def h(self, node):
+        """ Return the number of misplaced tiles (the blank included, as in EightPuzzle.h),
+        found by folding each differing 4-bit cell down to a single bit and counting them """
 
-        inversion = 0
-        for i in range(len(state)):
-            for j in range(i + 1, len(state)):
-                if (state[i] > state[j]) and state[i] != 0 and state[j] != 0:
-                    inversion += 1
+        diff = (node.state ^ self.goal) & self.CELL_MASK
+        diff = (diff | (diff >> 1) | (diff >> 2) | (diff >> 3)) & 0x111111111
+        return bin(diff).count('1')
 
-        return inversion % 2 == 0
+    def h_delta(self, state, action):
+        """ Return the change in h (misplaced tiles) made by applying action to state """
 
-    def h(self, node):
-        """ Return the heuristic value for a given state. Default heuristic function used is 
-        h(n) = number of misplaced tiles """
+        blank_offset, neighbor_offset, _ = self.moves_table[state >> self.BLANK_SHIFT][action]
+        tile = (state >> neighbor_offset) & 0xF
+        goal_blank, goal_neighbor = (self.goal >> blank_offset) & 0xF, (self.goal >> neighbor_offset) & 0xF
+        return ((tile != goal_blank) + (goal_neighbor != 0) -
+                (tile != goal_neighbor) - (goal_blank != 0))
 
-        return sum(s != g for (s, g) in zip(node.state, self.goal))
+    def h_manhattan(self, node):
+        """ Return the sum of the Manhattan distances of the tiles from their goal cells """
+
+        return super().h_manhattan(Node(self.unpack(self.pack(node.state))))
+
+    def h_linear_conflict(self, node):
+        """ Return the linear conflict heuristic of SlidingPuzzle on the unpacked state """
+
+        return super().h_linear_conflict(Node(self.unpack(self.pack(node.state))))
+
+    def h_walking_distance(self, node):
+        """ Return the walking distance heuristic of SlidingPuzzle on the unpacked state """
+
+        return super().h_walking_distance(Node(self.unpack(self.pack(node.state))))
+
+    def h_manhattan_delta(self, state, action):
+        """ Return the change in h_manhattan made by applying action to state """
+
+        blank_offset, neighbor_offset, _ = self.moves_table[state >> self.BLANK_SHIFT][action]
+        distances = self.distances[(state >> neighbor_offset) & 0xF]
+        return distances[blank_offset >> 2] - distances[neighbor_offset >> 2]
+
+
+def _eight_puzzle_tables():
+    """Return the legal actions for each position of the blank square on the 3x3
+    board, and for each action the bit offsets of the blank and of the neighbor it
+    swaps with, plus the xor that moves the cached blank index in a packed state."""
+    delta = {'UP': -3, 'DOWN': 3, 'LEFT': -1, 'RIGHT': 1}
+    actions_table, moves_table = [], []
+    for blank in range(9):
+        actions = tuple(EightPuzzle(None).actions((1,) * blank + (0,)))
+        actions_table.append(actions)
+        moves = {}
+        for action in actions:
+            neighbor = blank + delta[action]
+            moves[action] = (blank << 2, neighbor << 2, (blank ^ neighbor) << PackedEightPuzzle.BLANK_SHIFT)
+        moves_table.append(moves)
+    return actions_table, moves_table
+
+
+PackedEightPuzzle.actions_table, PackedEightPuzzle.moves_table = _eight_puzzle_tables()
 
 
 # ______________________________________________________________________________
@@ -600,9 +1496,11 @@ class PlanRoute(Problem):
 # Other search algorithms
 
 
-def recursive_best_first_search(problem, h=None):
-    """[Figure 3.26]"""
-    h = memoize(h or problem.h, 'h')
+def recursive_best_first_search(problem, h=None, h_cache=False):
+    """[Figure 3.26]
+    RBFS generates the same states over and over, so with h_cache their h values
+    are kept in the heuristic_cache for the problem; see astar_search."""
+    h = cached_h(problem, h, h_cache)
 
     def RBFS(problem, node, flimit):
         if problem.goal_test(node.state):
@@ -1194,6 +2092,10 @@ class GraphProblem(Problem):
     def path_cost(self, cost_so_far, A, action, B):
         return cost_so_far + (self.graph.get(A, B) or np.inf)
 
+    def heuristic_key(self):
+        """The straight-line distance depends on the graph's locations as well as the goal."""
+        return self.goal, self.graph
+
     def find_min_edge(self):
         """Find minimum value of edges."""
         m = np.inf
@@ -1515,37 +2417,135 @@ def mutate_boggle(board):
 
 
 class InstrumentedProblem(Problem):
-    """Delegates to a problem, and keeps statistics."""
-
-    def __init__(self, problem):
+    """Delegates to a problem, and keeps statistics: the number of successor
+    lists (succs), goal tests and states generated, and also
+    - the wall and CPU time spent in, and calls of, each of timed_methods,
+    - the peak size of the frontier, counted as the distinct states generated
+      but not yet expanded,
+    - the size of the explored set (distinct states expanded), sampled every
+      sample_every expansions as (seconds, explored, frontier),
+    - nodes expanded per second, and
+    - with trace_memory=True, the peak memory allocated while searching, as
+      measured by tracemalloc.
+    The sets of states behind the frontier and explored counts take memory of
+    their own; a mutable state (as ida_star_search changes in place) is kept in
+    them as a tuple copy. The backward search of bidirectional_search runs on
+    reversed(), another InstrumentedProblem, kept as backward. stats() returns everything as a dict, and write_jsonl() appends
+    it as a JSON line."""
+
+    timed_methods = ('actions', 'result', 'goal_test', 'h', 'path_cost')
+
+    def __init__(self, problem, trace_memory=False, sample_every=1000):
         self.problem = problem
         self.succs = self.goal_tests = self.states = 0
         self.found = None
+        self.calls = dict.fromkeys(self.timed_methods, 0)
+        self.wall = dict.fromkeys(self.timed_methods, 0.0)
+        self.cpu = dict.fromkeys(self.timed_methods, 0.0)
+        self.generated, self.expanded = {self.state_key(problem.initial)}, set()
+        self.peak_frontier = 1
+        self.sample_every = sample_every
+        self.explored_profile = []
+        self.backward = None
+        self.trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self.trace_memory:
+            tracemalloc.start()
+        self.start = self.last = time.perf_counter()
+
+    @staticmethod
+    def state_key(state):
+        """Return state, or a tuple copy of it if it is mutable and cannot be hashed."""
+        try:
+            hash(state)
+        except TypeError:
+            return tuple(state)
+        return state
+
+    def timed(self, method, *args):
+        """Call method of the problem with args, adding the time it takes to its totals."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = getattr(self.problem, method)(*args)
+        self.last = time.perf_counter()
+        self.wall[method] += self.last - wall
+        self.cpu[method] += time.process_time() - cpu
+        self.calls[method] += 1
+        return result
 
     def actions(self, state):
         self.succs += 1
-        return self.problem.actions(state)
+        self.expanded.add(self.state_key(state))
+        if self.succs % self.sample_every == 0:
+            self.explored_profile.append((round(self.last - self.start, 6), len(self.expanded),
+                                          len(self.generated) - len(self.expanded)))
+        return self.timed('actions', state)
 
     def result(self, state, action):
         self.states += 1
-        return self.problem.result(state, action)
+        result = self.timed('result', state, action)
+        self.generated.add(self.state_key(result))
+        self.peak_frontier = max(self.peak_frontier, len(self.generated) - len(self.expanded))
+        return result
 
     def goal_test(self, state):
         self.goal_tests += 1
-        result = self.problem.goal_test(state)
+        result = self.timed('goal_test', state)
         if result:
-            self.found = state
+            self.found = self.state_key(state)
         return result
 
     def path_cost(self, c, state1, action, state2):
-        return self.problem.path_cost(c, state1, action, state2)
+        return self.timed('path_cost', c, state1, action, state2)
+
+    def h(self, node):
+        return self.timed('h', node)
 
     def value(self, state):
         return self.problem.value(state)
 
+    def heuristic_key(self):
+        return self.problem.heuristic_key()
+
+    def reversed(self):
+        """Instrument the reversed problem as well, keeping it as self.backward."""
+        self.backward = InstrumentedProblem(self.problem.reversed(), sample_every=self.sample_every)
+        return self.backward
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
+    def stats(self):
+        """Return the statistics gathered so far as a dict of JSON-friendly values."""
+        seconds = self.last - self.start
+        stats = dict(problem=name(self.problem), succs=self.succs, goal_tests=self.goal_tests,
+                     states=self.states, found=None if self.found is None else str(self.found),
+                     seconds=seconds, nodes_per_second=self.succs / seconds if seconds else 0.0,
+                     explored=len(self.expanded), peak_frontier=self.peak_frontier,
+                     explored_profile=self.explored_profile,
+                     methods={method: dict(calls=self.calls[method], wall=self.wall[method],
+                                           cpu=self.cpu[method])
+                              for method in self.timed_methods})
+        if self.backward is not None:
+            stats['backward'] = self.backward.stats()
+        if tracemalloc.is_tracing():
+            stats['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        return stats
+
+    def write_jsonl(self, file, **fields):
+        """Append stats(), with any extra fields (e.g. searcher=...), to file as a
+        single JSON line; file is a path or an open text file."""
+        line = json.dumps(dict(fields, **self.stats())) + '\n'
+        if isinstance(file, str):
+            with open(file, 'a') as f:
+                f.write(line)
+        else:
+            file.write(line)
+
+    def close(self):
+        """Stop tracing memory, if this instance started it."""
+        if self.trace_memory:
+            tracemalloc.stop()
+            self.trace_memory = False
+
     def __repr__(self):
         return '<{:4d}/{:4d}/{:4d}/{}>'.format(self.succs, self.goal_tests,
                                                self.states, str(self.found)[:4])
@@ -0,0 +1,461 @@
+'''
+Unit tests for search.py
+'''
+
+from search import *
+import io
+import json
+import time
+import unittest
+import unittest.mock
+
+
+class TestIndexedPriorityQueue(unittest.TestCase):
+
+    def test_order_and_lookup(self):
+        queue = IndexedPriorityQueue('min', lambda x: x[1])
+        queue.extend([('a', 5), ('b', 2), ('c', 9), ('d', 1)])
+        self.assertTrue(('b', 2) in queue)
+        self.assertEqual(queue[('c', 9)], 9)
+        del queue[('b', 2)]
+        self.assertFalse(('b', 2) in queue)
+        self.assertRaises(KeyError, queue.__getitem__, ('b', 2))
+        self.assertEqual([queue.pop() for _ in range(len(queue))], [('d', 1), ('a', 5), ('c', 9)])
+
+    def test_ties(self):
+        # items of equal f are never compared, and come out by tie, then insertion order
+        items = [[1, 'a'], [0, 'b'], [1, 'c'], [0, 'd']]
+        queue = PriorityQueue('min', lambda x: 0)
+        queue.extend(items)
+        self.assertEqual([queue.pop() for _ in range(4)], items)
+        queue = IndexedPriorityQueue('min', lambda x: 0, lifo=True)
+        queue.extend(map(tuple, items))
+        self.assertEqual([queue.pop()[1] for _ in range(4)], ['d', 'c', 'b', 'a'])
+        queue = IndexedPriorityQueue('min', lambda x: 0, tie=lambda x: x[0])
+        queue.extend(map(tuple, items))
+        self.assertEqual([queue.pop()[1] for _ in range(4)], ['b', 'd', 'a', 'c'])
+
+    def test_decrease_key(self):
+        queue = IndexedPriorityQueue('min', lambda node: node.path_cost)
+        queue.extend([Node('A', path_cost=4), Node('B', path_cost=3), Node('C', path_cost=7)])
+        queue.append(Node('C', path_cost=1))
+        self.assertEqual(len(queue), 3)
+        self.assertEqual(queue[Node('C')], 1)
+        self.assertEqual([queue.pop().state for _ in range(3)], ['C', 'B', 'A'])
+
+
+class TestCache(unittest.TestCase):
+
+    def test_lru_and_lfu(self):
+        lru, lfu = Cache(2), Cache(2, policy='lfu')
+        for cache in (lru, lfu):
+            cache['a'], cache['b'] = 1, 2
+            self.assertEqual([cache['a'], cache['a']], [1, 1])
+            cache['b']
+            cache['c'] = 3
+        self.assertEqual(list(lru.data), ['b', 'c'])
+        self.assertEqual(sorted(lfu.data), ['a', 'c'])
+        self.assertRaises(KeyError, lru.__getitem__, 'a')
+        self.assertEqual(lru.stats()['evictions'], 1)
+        self.assertEqual(lru.info(), CacheInfo(hits=3, misses=1, maxsize=2, currsize=2))
+        self.assertRaises(ValueError, Cache, policy='random')
+
+    def test_bytes_and_ttl(self):
+        cache = Cache(None, maxbytes=100, sizeof=len)
+        cache['aa'] = 'x' * 40
+        cache['bb'] = 'y' * 40
+        cache['cc'] = 'z' * 40
+        self.assertEqual(list(cache.data), ['bb', 'cc'])
+        self.assertEqual(cache.bytes, 84)
+        cache = Cache(ttl=0.05)
+        cache['a'] = 1
+        self.assertIn('a', cache)
+        time.sleep(0.06)
+        self.assertNotIn('a', cache)
+        self.assertRaises(KeyError, cache.__getitem__, 'a')
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_disk(self):
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            cache = Cache(1, disk=os.path.join(directory, 'cache'))
+            cache[('a', 1)] = 'first'
+            cache[('b', 2)] = 'second'
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache[('a', 1)], 'first')
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+            self.assertEqual(cache[('b', 2)], 'second')
+            cache.clear()
+            self.assertNotIn(('a', 1), cache)
+            cache.close()
+
+    def test_memoize(self):
+        calls = []
+
+        def square(x):
+            calls.append(x)
+            return x * x
+        memoized = memoize(square, maxsize=2, policy='lfu')
+        self.assertEqual([memoized(x) for x in (3, 3, 4, 5, 3)], [9, 9, 16, 25, 9])
+        self.assertEqual(calls, [3, 4, 5])
+        self.assertEqual(memoized.cache.info().hits, 2)
+        self.assertIsNone(memoize(square, 'f').cache)
+        unbounded = memoize(square)
+        for x in range(100):
+            unbounded(x)
+        self.assertEqual(unbounded.cache.info().currsize, 100)
+
+
+class TestNode(unittest.TestCase):
+
+    def test_slots(self):
+        node = Node('Arad')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertRaises(AttributeError, setattr, node, 'extra', 1)
+        self.assertGreater(bytes_per_node(node, include_state=True), bytes_per_node(node))
+
+
+class TestSearchers(unittest.TestCase):
+
+    def test_astar_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(astar_search(problem).solution(), ['Sibiu', 'Rimnicu', 'Pitesti', 'Bucharest'])
+        self.assertEqual(uniform_cost_search(problem).path_cost, 418)
+        self.assertEqual(recursive_best_first_search(problem).solution(), ['Sibiu', 'Rimnicu', 'Pitesti', 'Bucharest'])
+
+    def test_graph_searches(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(breadth_first_graph_search(problem).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        self.assertEqual(depth_first_graph_search(problem).state, 'Bucharest')
+        self.assertEqual(len(breadth_first_graph_search(EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4))).solution()), 16)
+
+    def test_sma_star_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(sma_star_search(problem, max_nodes=5).path_cost, 418)
+        # the optimal path needs 5 nodes; with 4 the best that fits is found
+        self.assertEqual(sma_star_search(problem, max_nodes=4).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        self.assertIsNone(sma_star_search(problem, max_nodes=3))
+        for max_nodes in (0, 1):
+            self.assertRaises(ValueError, sma_star_search, problem, max_nodes=max_nodes)
+        puzzle = EightPuzzle((8, 7, 5, 2, 0, 6, 3, 1, 4))
+        node = sma_star_search(puzzle, puzzle.h_manhattan, max_nodes=30)
+        self.assertEqual(len(node.solution()), 24)
+        self.assertTrue(puzzle.goal_test(node.state))
+
+    def test_ara_star_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        results = [(node.path_cost, bound) for node, bound in ara_star_search(problem, weight=3)]
+        self.assertEqual(results[-1], (418, 1))
+        self.assertEqual(results[0][0], 450)
+        self.assertLessEqual(results[0][0], 418 * results[0][1])
+        puzzle = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        results = list(ara_star_search(puzzle, puzzle.h_manhattan))
+        self.assertEqual([len(node.solution()) for node, bound in results][-1], 31)
+        bounds = [bound for node, bound in results]
+        self.assertEqual(bounds, sorted(bounds, reverse=True))
+        self.assertEqual(list(ara_star_search(puzzle, deadline=time.perf_counter())), [])
+
+    def test_beam_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        # the first level with a goal wins, even though a deeper path is cheaper
+        self.assertEqual(beam_search(problem, 3).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        puzzle = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        instrumented = InstrumentedProblem(puzzle)
+        node = beam_search(instrumented, 100, lambda n: n.path_cost + puzzle.h_manhattan(n))
+        self.assertEqual(len(node.solution()), 31)
+        self.assertLessEqual(instrumented.succs, 100 * 31)
+        self.assertGreater(len(beam_search(puzzle, 10, puzzle.h_manhattan).solution()), 31)
+
+    def test_max_frontier(self):
+        queue = IndexedPriorityQueue('min', lambda x: x)
+        queue.extend([5, 1, 4, 2, 3])
+        queue.prune(3)
+        self.assertEqual([queue.pop() for _ in range(len(queue))], [1, 2, 3])
+        puzzle = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        self.assertEqual(len(astar_search(puzzle, puzzle.h_manhattan, max_frontier=100).solution()), 31)
+        self.assertTrue(puzzle.goal_test(astar_search(puzzle, puzzle.h_manhattan, max_frontier=10).state))
+        # the frontier holds at most max_frontier nodes whenever one is taken from it
+        sizes = []
+
+        class RecordingQueue(IndexedPriorityQueue):
+            def pop(self):
+                sizes.append(len(self))
+                return super().pop()
+        with unittest.mock.patch('search.IndexedPriorityQueue', RecordingQueue):
+            astar_search(puzzle, puzzle.h_manhattan, max_frontier=100)
+        self.assertLessEqual(max(sizes), 100)
+        self.assertGreater(max(sizes), 75)
+
+    def test_permutation_explored_set(self):
+        from permutation_rank import PermutationSet
+        puzzle = EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4))
+        explored = PermutationSet(9)
+        self.assertEqual(len(breadth_first_graph_search(puzzle, explored).solution()), 16)
+        self.assertGreater(len(explored), 1000)
+        self.assertLess(len(explored.bits), 23000)
+        self.assertEqual(len(astar_search(puzzle, puzzle.h_manhattan, explored=PermutationSet(9)).solution()), 16)
+        self.assertEqual(depth_first_graph_search(puzzle, PermutationSet(9)).state, puzzle.goal)
+
+    def test_tie_breaking(self):
+        puzzle = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        expansions = {}
+        for tie in tie_breaking:
+            problem = InstrumentedProblem(puzzle)
+            self.assertEqual(len(astar_search(problem, puzzle.h_manhattan, h_cache=False, tie=tie).solution()), 31)
+            expansions[tie] = problem.succs
+        self.assertLess(expansions['high_g'], expansions['fifo'])
+        self.assertEqual(expansions['high_g'], expansions['low_h'])
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        for tie in tie_breaking:
+            self.assertEqual(astar_search(problem, tie=tie).path_cost, 418)
+        self.assertRaises(ValueError, best_first_graph_search, problem, lambda n: 0, tie='random')
+
+    def test_heuristic_cache(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        heuristic_caches.clear()
+        cache = heuristic_cache(problem)
+        self.assertIs(heuristic_cache(GraphProblem('Sibiu', 'Bucharest', romania_map)), cache)
+        self.assertIsNot(heuristic_cache(GraphProblem('Arad', 'Neamt', romania_map)), cache)
+        self.assertEqual(recursive_best_first_search(problem, h_cache=True).path_cost, 418)
+        misses = cache.info().misses
+        self.assertGreater(cache.info().hits, 0)
+        self.assertEqual(astar_search(problem, h_cache=True).path_cost, 418)
+        self.assertEqual(cache.info().misses, misses)  # every state was seen by RBFS
+        small = Cache(2)
+        h = memoize(problem.h, 'h', key=lambda node: node.state, cache=small)
+        for state in ['Arad', 'Sibiu', 'Arad', 'Zerind']:
+            h(Node(state))
+        self.assertEqual(small.info(), CacheInfo(hits=1, misses=3, maxsize=2, currsize=2))
+        self.assertEqual(list(small.data), ['Arad', 'Zerind'])
+        self.assertEqual(len(heuristic_caches), 2)
+        for goal in range(MAX_HEURISTIC_CACHES + 1):
+            heuristic_cache(Problem(None, goal), lambda node: 0)
+        self.assertEqual(len(heuristic_caches), MAX_HEURISTIC_CACHES)
+        self.assertNotIn(cache, heuristic_caches.values())
+
+    def test_heuristic_cache_keys(self):
+        # problems with the same goal but a different h must not share cached values
+        import eight
+        heuristic_caches.clear()
+        far = UndirectedGraph({'A': {'B': 100, 'G': 6}})
+        far.locations = {'A': (0, 0), 'B': (100, 0), 'G': (6, 0)}
+        near = UndirectedGraph({'A': {'B': 1, 'G': 6}, 'B': {'G': 1}})
+        near.locations = {'A': (0, 0), 'B': (1, 0), 'G': (2, 0)}
+        for graph, cost in ((far, 6), (near, 2)):
+            self.assertEqual(astar_search(InstrumentedProblem(GraphProblem('A', 'G', graph)), h_cache=True).path_cost,
+                             cost)
+        for heuristic in ('h_manhattan_distance', 'h_mismatched_tiles', 'h_disabled'):
+            counts = []
+            for h_cache in (True, False):
+                problem = InstrumentedProblem(eight.EightPuzzle('125634780', '012345678', heuristic))
+                astar_search(problem, h_cache=h_cache)
+                counts.append(problem.succs)
+            self.assertEqual(counts[0], counts[1])
+        self.assertEqual(astar_search(GraphProblem('A', 'G', near)).path_cost, 2)
+
+        class ManhattanPuzzle(EightPuzzle):
+            h = EightPuzzle.h_manhattan
+        state = (7, 1, 5, 8, 3, 6, 0, 2, 4)
+        misplaced = heuristic_cache(InstrumentedProblem(EightPuzzle(state)))
+        self.assertIsNot(heuristic_cache(InstrumentedProblem(ManhattanPuzzle(state))), misplaced)
+        self.assertIs(heuristic_cache(EightPuzzle(state)), misplaced)
+        counts = []
+        for puzzle, h_cache in ((EightPuzzle(state), True), (ManhattanPuzzle(state), True),
+                                (ManhattanPuzzle(state), False)):
+            problem = InstrumentedProblem(puzzle)
+            astar_search(problem, h_cache=h_cache)
+            counts.append(problem.succs)
+        self.assertEqual(counts[1], counts[2])
+
+    def test_depth_limited_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(depth_limited_search(problem, 2), 'cutoff')
+        self.assertEqual(iterative_deepening_search(problem).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        self.assertEqual(iterative_deepening_search(problem, table_size=0).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        self.assertIsNone(depth_limited_search(GraphProblem('Arad', 'Nowhere', romania_map), 30))
+        # far deeper than the recursion limit
+        chain = GraphProblem(0, 5000, UndirectedGraph({i: {i + 1: 1} for i in range(5000)}))
+        self.assertEqual(depth_limited_search(chain, 6000).depth, 5000)
+        puzzle = EightPuzzle((6, 2, 3, 1, 0, 5, 4, 7, 8))
+        self.assertEqual(len(iterative_deepening_search(puzzle, table_size=100).solution()), 14)
+        self.assertEqual(len(iterative_deepening_search(puzzle).solution()), 14)
+
+    def test_frontier_search(self):
+        import eight
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(frontier_breadth_first_search(problem).solution(), ['Sibiu', 'Fagaras', 'Bucharest'])
+        self.assertEqual(frontier_uniform_cost_search(problem).path_cost, 418)
+        self.assertIsNone(frontier_uniform_cost_search(GraphProblem('Arad', 'Nowhere', romania_map)))
+        self.assertEqual(frontier_breadth_first_search(GraphProblem('Arad', 'Arad', romania_map)).solution(), [])
+        for puzzle in [EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)), eight.EightPuzzle("125340678", "012345678")]:
+            node = frontier_breadth_first_search(puzzle)
+            self.assertTrue(puzzle.goal_test(node.state))
+            self.assertEqual(len(node.solution()), len(breadth_first_graph_search(puzzle).solution()))
+
+    def test_bidirectional_search(self):
+        node = bidirectional_search(GraphProblem('Oradea', 'Neamt', romania_map))
+        self.assertEqual(node.path_cost, 835)
+        self.assertEqual([node.path()[0].state, node.state], ['Oradea', 'Neamt'])
+        node = bidirectional_search(EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)))
+        self.assertEqual(len(node.solution()), 16)
+        self.assertEqual(node.state, (1, 2, 3, 4, 5, 6, 7, 8, 0))
+
+    def test_reversed(self):
+        import eight
+        # the backward search's h is measured against the initial state, its goal
+        for puzzle in [EightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)), PackedEightPuzzle((7, 1, 5, 8, 3, 6, 0, 2, 4)),
+                       SlidingPuzzle((1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 0, 14, 15)),
+                       eight.EightPuzzle("125340678", "012345678", "h_manhattan_distance")]:
+            backward = puzzle.reversed()
+            self.assertEqual((backward.initial, backward.goal), (puzzle.goal, puzzle.initial))
+            self.assertEqual(backward.h(Node(backward.goal)), 0)
+            self.assertEqual(backward.h(Node(backward.initial)), puzzle.h(Node(puzzle.initial)))
+        problem = InstrumentedProblem(eight.EightPuzzle("125340678", "012345678", "h_manhattan_distance"))
+        self.assertEqual(bidirectional_search(problem).solution(), ['u', 'l', 'l'])
+        self.assertEqual(problem.backward.goal, "125340678")
+        self.assertGreater(problem.succs + problem.backward.succs, 0)
+
+    def test_ida_star_search(self):
+        problem = GraphProblem('Arad', 'Bucharest', romania_map)
+        self.assertEqual(ida_star_search(problem).solution(), ['Sibiu', 'Rimnicu', 'Pitesti', 'Bucharest'])
+        puzzle = EightPuzzle((8, 6, 7, 2, 5, 4, 3, 0, 1))
+        node = ida_star_search(puzzle, puzzle.h_manhattan, puzzle.h_manhattan_delta)
+        self.assertEqual(len(node.solution()), 31)
+        self.assertTrue(puzzle.goal_test(node.state))
+        packed = PackedEightPuzzle(puzzle.initial)
+        self.assertEqual(len(ida_star_search(packed, packed.h_manhattan, packed.h_manhattan_delta).solution()), 31)
+
+
+class TestInstrumentedProblem(unittest.TestCase):
+
+    def test_stats(self):
+        problem = InstrumentedProblem(GraphProblem('Arad', 'Bucharest', romania_map), sample_every=2)
+        heuristic_caches.clear()
+        astar_search(problem, h_cache=True)
+        stats = problem.stats()
+        self.assertEqual(repr(problem), '<   5/   6/  15/Buch>')
+        self.assertEqual(stats['explored'], 5)
+        # h is computed once for each of the 10 distinct states generated
+        self.assertEqual(stats['methods']['h']['calls'], 10)
+        self.assertEqual(stats['methods']['result']['calls'], 15)
+        self.assertEqual(len(stats['explored_profile']), 2)
+        self.assertGreaterEqual(stats['peak_frontier'], 4)
+        out = io.StringIO()
+        problem.write_jsonl(out, searcher='astar_search')
+        self.assertEqual(json.loads(out.getvalue())['searcher'], 'astar_search')
+
+    def test_in_place_states(self):
+        # ida_star_search changes a list state in place; it is counted as a tuple
+        problem = InstrumentedProblem(EightPuzzle((1, 2, 3, 4, 0, 6, 7, 5, 8)))
+        node = ida_star_search(problem)
+        self.assertEqual(node.solution(), ['DOWN', 'RIGHT'])
+        stats = problem.stats()
+        self.assertEqual(stats['found'], str((1, 2, 3, 4, 5, 6, 7, 8, 0)))
+        self.assertGreaterEqual(stats['explored'], 2)
+
+
+class TestEightPuzzle(unittest.TestCase):
+
+    def test_heuristic_deltas(self):
+        puzzle = EightPuzzle((1, 2, 3, 4, 0, 6, 7, 5, 8))
+        state = puzzle.initial
+        self.assertEqual(puzzle.h_manhattan(Node(state)), 2)
+        for action in puzzle.actions(state):
+            child = puzzle.result(state, action)
+            self.assertEqual(puzzle.h(Node(child)) - puzzle.h(Node(state)), puzzle.h_delta(state, action))
+            self.assertEqual(puzzle.h_manhattan(Node(child)) - puzzle.h_manhattan(Node(state)),
+                             puzzle.h_manhattan_delta(state, action))
+
+    def test_apply_in_place(self):
+        puzzle = EightPuzzle((1, 2, 3, 4, 0, 6, 7, 5, 8))
+        state = puzzle.copy_state(puzzle.initial)
+        puzzle.apply(state, 'DOWN')
+        self.assertEqual(tuple(state), puzzle.result(puzzle.initial, 'DOWN'))
+        puzzle.apply(state, puzzle.reverse('DOWN'))
+        self.assertEqual(tuple(state), puzzle.initial)
+
+
+class TestSlidingPuzzle(unittest.TestCase):
+
+    def setUp(self):
+        self.puzzle = SlidingPuzzle((1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 0, 15))
+
+    def test_actions_and_result(self):
+        puzzle = self.puzzle
+        self.assertEqual(puzzle.n, 4)
+        self.assertEqual(puzzle.goal, bytes(list(range(1, 16)) + [0]))
+        self.assertEqual(puzzle.actions(puzzle.initial), ('UP', 'LEFT', 'RIGHT'))
+        self.assertTrue(puzzle.goal_test(puzzle.result(puzzle.initial, 'RIGHT')))
+        state = puzzle.copy_state(puzzle.initial)
+        puzzle.apply(state, 'RIGHT')
+        self.assertTrue(puzzle.goal_test(state))
+
+    def test_heuristics(self):
+        # 3 1 2 / 4 5 6 / 7 8 0: tiles 1 and 2 must pass tile 3 in the top row
+        puzzle = SlidingPuzzle((3, 1, 2, 4, 5, 6, 7, 8, 0))
+        node = Node(puzzle.initial)
+        self.assertEqual(puzzle.h_manhattan(node), 4)
+        self.assertEqual(puzzle.h_linear_conflict(node), 6)
+        self.assertEqual(puzzle.h_walking_distance(node), 6)
+        self.assertEqual(len(astar_search(puzzle).solution()), 16)
+        node = Node(self.puzzle.initial)
+        self.assertEqual([self.puzzle.h_manhattan(node), self.puzzle.h_linear_conflict(node),
+                          self.puzzle.h_walking_distance(node)], [1, 1, 1])
+
+    def test_solvability(self):
+        self.assertEqual(inversions([3, 1, 2, 5, 4]), 3)
+        self.assertTrue(self.puzzle.check_solvability(self.puzzle.initial))
+        self.assertFalse(self.puzzle.check_solvability((2, 1) + tuple(range(3, 16)) + (0,)))
+        # on the 4x4 board a vertical move flips the inversion parity
+        self.assertTrue(self.puzzle.check_solvability(self.puzzle.result(self.puzzle.goal, 'UP')))
+        self.assertRaises(ValueError, SlidingPuzzle, (2, 1, 3, 4, 5, 6, 7, 8, 0))
+        self.assertRaises(ValueError, PackedEightPuzzle, (2, 1, 3, 4, 5, 6, 7, 8, 0))
+
+    def test_random_sliding_puzzle(self):
+        rng = random.Random(7)
+        for depth in (0, 5, 12):
+            state = random_sliding_puzzle(3, depth, rng=rng)
+            self.assertEqual(len(astar_search(SlidingPuzzle(state)).solution()), depth)
+        state = random_sliding_puzzle(4, rng=rng)
+        self.assertEqual(sorted(state), list(range(16)))
+        self.assertTrue(SlidingPuzzle(state).check_solvability(state))
+        # no 8-puzzle state is 32 moves from the goal (or 31 from one with the blank in the centre)
+        for n, depth, goal in ((3, 32, None), (3, 31, (1, 2, 3, 4, 0, 5, 6, 7, 8)), (3, -1, None),
+                               (3, 2.5, None), (4, 81, None)):
+            self.assertRaises(ValueError, random_sliding_puzzle, n, depth, goal, rng)
+        self.assertEqual(len(random_sliding_puzzle(3, 30, (1, 2, 3, 4, 0, 5, 6, 7, 8), rng,
+                                                   lambda state: 30)), 9)
+
+    def test_fifteen_puzzle(self):
+        puzzle = SlidingPuzzle((5, 1, 2, 3, 9, 6, 7, 4, 13, 10, 11, 8, 0, 14, 15, 12))
+        for h in (puzzle.h_linear_conflict, puzzle.h_walking_distance):
+            self.assertEqual(len(astar_search(puzzle, h).solution()), 9)
+        node = ida_star_search(puzzle, puzzle.h_manhattan, puzzle.h_manhattan_delta)
+        self.assertEqual(node.state, puzzle.goal)
+        self.assertEqual(len(node.solution()), 9)
+
+
+class TestPackedEightPuzzle(unittest.TestCase):
+
+    def test_matches_eight_puzzle(self):
+        state = (1, 2, 3, 4, 5, 6, 0, 7, 8)
+        puzzle, packed = EightPuzzle(state), PackedEightPuzzle(state)
+        self.assertEqual(PackedEightPuzzle.unpack(packed.initial), state)
+        self.assertEqual(packed.find_blank_square(packed.initial), 6)
+        for action in puzzle.actions(state):
+            self.assertEqual(PackedEightPuzzle.unpack(packed.result(packed.initial, action)),
+                             puzzle.result(state, action))
+        self.assertEqual(packed.h(Node(packed.initial)), puzzle.h(Node(state)))
+        state = (8, 6, 7, 2, 5, 4, 3, 0, 1)
+        puzzle, packed = EightPuzzle(state), PackedEightPuzzle(state)
+        for h in ('h_manhattan', 'h_linear_conflict', 'h_walking_distance'):
+            self.assertEqual(getattr(packed, h)(Node(packed.initial)), getattr(puzzle, h)(Node(state)))
+
+    def test_astar_search(self):
+        self.assertEqual(astar_search(PackedEightPuzzle((1, 2, 3, 4, 5, 6, 0, 7, 8))).solution(),
+                         ['RIGHT', 'RIGHT'])
+
+
+if __name__ == "__main__":
+    unittest.main()
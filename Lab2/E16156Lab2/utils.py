@@ -3,11 +3,16 @@
 import bisect
 import collections
 import collections.abc
+import dbm
 import functools
 import heapq
+import itertools
 import operator
 import os.path
+import pickle
 import random
+import sys
+import time
 from itertools import chain, combinations
 from statistics import mean
 import numpy as np
@@ -44,6 +49,31 @@ def count(seq):
     return sum(map(bool, seq))
 
 
+def inversions(seq):
+    """Count the pairs i < j with seq[i] > seq[j], by merge sort in O(n log n)."""
+    if len(seq) < 2:
+        return 0
+    items = list(seq)
+    width, total = 1, 0
+    while width < len(items):
+        merged = []
+        for lo in range(0, len(items), 2 * width):
+            left, right = items[lo:lo + width], items[lo + width:lo + 2 * width]
+            i = j = 0
+            while i < len(left) and j < len(right):
+                if right[j] < left[i]:
+                    # right[j] is smaller than everything left in left
+                    total += len(left) - i
+                    merged.append(right[j])
+                    j += 1
+                else:
+                    merged.append(left[i])
+                    i += 1
+            merged += left[i:] + right[j:]
+        items, width = merged, 2 * width
+    return total
+
+
 def multimap(items):
     """Given (key, val) pairs, return {key: [val, ....], ...}."""
     result = collections.defaultdict(list)
@@ -404,23 +434,195 @@ class injection:
         globals().update(self.old)
 
 
-def memoize(fn, slot=None, maxsize=32):
+CacheInfo = collections.namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+class Cache:
+    """A mapping from keys to computed values that forgets some of them, with
+    statistics. It holds up to maxsize entries (None for no limit) and, if maxbytes
+    is given, entries whose keys and values take up to maxbytes as measured by
+    sizeof; past either bound it evicts the least recently used entry (policy='lru')
+    or the least frequently used, oldest first among equals (policy='lfu'). With
+    ttl, an entry expires that many seconds after it was stored. With disk, a path,
+    evicted entries are pickled into a dbm file there and brought back when asked
+    for, so keys must pickle the same whenever they are equal (tuples, strings and
+    numbers do). Looking up a missing key raises KeyError; get() returns a default.
+    info() gives the hits, misses, maxsize and size, like the cache_info() of
+    functools.lru_cache, and stats() everything counted."""
+
+    missing = object()  # get()'s default in memoize, where None may be a value
+
+    def __init__(self, maxsize=128, policy='lru', maxbytes=None, ttl=None, disk=None, sizeof=sys.getsizeof):
+        if policy not in ('lru', 'lfu'):
+            raise ValueError('Unknown cache policy: {}'.format(policy))
+        self.maxsize, self.policy, self.maxbytes, self.ttl, self.sizeof = maxsize, policy, maxbytes, ttl, sizeof
+        self.data = collections.OrderedDict()  # least recently used first
+        self.uses = {}  # for lfu, the number of times each key was used
+        self.by_uses = {}  # for lfu, the keys used a given number of times, oldest first
+        self.expires = {}  # for ttl, when each entry expires, on the time.monotonic() clock
+        self.sizes = {}  # for maxbytes, the size of each entry
+        self.bytes = 0
+        self.disk = dbm.open(disk, 'c') if disk else None
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+
+    def __getitem__(self, key):
+        value = self.get(key, Cache.missing)
+        if value is Cache.missing:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        """Return the value for key, or default if there is none."""
+        data = self.data
+        if key in data:
+            if self.ttl is None or self.expires[key] > time.monotonic():
+                self.hits += 1
+                if self.policy == 'lru':
+                    data.move_to_end(key)
+                else:
+                    self.use(key)
+                return data[key]
+            self.expirations += 1
+            self.remove(key)
+        if self.disk is not None:
+            record = self.disk.get(pickle.dumps(key))
+            if record is not None:
+                del self.disk[pickle.dumps(key)]
+                expires, value = pickle.loads(record)
+                if expires is None or expires > time.monotonic():
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.insert(key, value, expires)
+                    self.evict(key)
+                    return value
+                self.expirations += 1
+        self.misses += 1
+        return default
+
+    def __setitem__(self, key, value):
+        if key in self.data:
+            self.remove(key)
+        self.insert(key, value, None if self.ttl is None else time.monotonic() + self.ttl)
+        if (self.maxsize is not None and len(self.data) > self.maxsize) or self.maxbytes is not None:
+            self.evict(key)
+
+    def __delitem__(self, key):
+        self.remove(key)
+
+    def __contains__(self, key):
+        """Whether key has an entry, in memory or on disk; this is not counted."""
+        if key in self.data:
+            return self.ttl is None or self.expires[key] > time.monotonic()
+        return self.disk is not None and pickle.dumps(key) in self.disk
+
+    def __len__(self):
+        return len(self.data)
+
+    def insert(self, key, value, expires):
+        self.data[key] = value
+        if self.policy == 'lfu':
+            self.uses[key] = 1
+            self.by_uses.setdefault(1, collections.OrderedDict())[key] = None
+        if expires is not None:
+            self.expires[key] = expires
+        if self.maxbytes is not None:
+            self.sizes[key] = self.sizeof(key) + self.sizeof(value)
+            self.bytes += self.sizes[key]
+
+    def use(self, key):
+        uses = self.uses[key]
+        self.unlist(key, uses)
+        self.uses[key] = uses + 1
+        self.by_uses.setdefault(uses + 1, collections.OrderedDict())[key] = None
+
+    def unlist(self, key, uses):
+        keys = self.by_uses[uses]
+        del keys[key]
+        if not keys:
+            del self.by_uses[uses]
+
+    def remove(self, key):
+        del self.data[key]
+        if self.policy == 'lfu':
+            self.unlist(key, self.uses.pop(key))
+        self.expires.pop(key, None)
+        self.bytes -= self.sizes.pop(key, 0)
+
+    def evict(self, keep=None):
+        """Drop entries, by the policy, until the cache is within its bounds."""
+        while self.data and ((self.maxsize is not None and len(self.data) > self.maxsize) or
+                             (self.maxbytes is not None and self.bytes > self.maxbytes)):
+            if self.policy == 'lru':
+                key = next(iter(self.data))
+            else:
+                # the oldest of the least used, but not the entry just stored, which
+                # would always be the one used least, unless it is all there is
+                candidates = (key for uses in sorted(self.by_uses) for key in self.by_uses[uses])
+                key = next((key for key in candidates if key != keep), keep)
+            if self.disk is not None:
+                self.disk[pickle.dumps(key)] = pickle.dumps((self.expires.get(key), self.data[key]))
+            self.remove(key)
+            self.evictions += 1
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
+
+    def stats(self):
+        """Return the counts kept, and the hit rate, as a dict."""
+        lookups = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, hit_rate=self.hits / lookups if lookups else 0.0,
+                    evictions=self.evictions, expirations=self.expirations, disk_hits=self.disk_hits,
+                    currsize=len(self.data), bytes=self.bytes, policy=self.policy)
+
+    def clear(self):
+        """Forget every entry, on disk too, and reset the statistics."""
+        for key in list(self.data):
+            self.remove(key)
+        if self.disk is not None:
+            for key in list(self.disk.keys()):
+                del self.disk[key]
+        self.hits = self.misses = self.evictions = self.expirations = self.disk_hits = 0
+
+    def close(self):
+        """Close the disk tier, if any."""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+
+def memoize(fn, slot=None, maxsize=None, key=None, cache=None, **options):
     """Memoize fn: make it remember the computed value for any argument list.
     If slot is specified, store result in that slot of first argument.
-    If slot is false, use lru_cache for caching the values."""
+    Values are kept in cache, a Cache, or else one made with maxsize (by default no
+    limit, so nothing is evicted) and any other options of Cache (policy, maxbytes,
+    ttl, disk), under key(*args), by default
+    the tuple of arguments. With a slot, there is only a Cache behind the slot if
+    cache or options are given. The Cache is available as memoized_fn.cache."""
+    if cache is None and (options or not slot):
+        cache = Cache(maxsize, **options)
+    key = key or (lambda *args: args)
     if slot:
         def memoized_fn(obj, *args):
             if hasattr(obj, slot):
                 return getattr(obj, slot)
-            else:
+            if cache is None:
                 val = fn(obj, *args)
-                setattr(obj, slot, val)
-                return val
+            else:
+                k = key(obj, *args)
+                val = cache.get(k, Cache.missing)
+                if val is Cache.missing:
+                    val = cache[k] = fn(obj, *args)
+            setattr(obj, slot, val)
+            return val
     else:
-        @functools.lru_cache(maxsize=maxsize)
         def memoized_fn(*args):
-            return fn(*args)
+            k = key(*args)
+            val = cache.get(k, Cache.missing)
+            if val is Cache.missing:
+                val = cache[k] = fn(*args)
+            return val
 
+    memoized_fn.cache = cache
     return memoized_fn
 
 
@@ -713,9 +915,9 @@ class hashabledict(dict):
 
 
 # ______________________________________________________________________________
-# Queues: Stack, FIFOQueue, PriorityQueue
+# Queues: Stack, FIFOQueue, PriorityQueue, IndexedPriorityQueue
 # Stack and FIFOQueue are implemented as list and collection.deque
-# PriorityQueue is implemented here
+# PriorityQueue and IndexedPriorityQueue are implemented here
 
 
 class PriorityQueue:
@@ -723,9 +925,13 @@ class PriorityQueue:
     order) is returned first.
     If order is 'min', the item with minimum f(x) is
     returned first; if order is 'max', then it is the item with maximum f(x).
+    Items with equal f(x) come out in order of tie(x), if tie is given, and then
+    in the order they were inserted, first in first out, or last in first out with
+    lifo=True; the heap holds (f(x), tie(x), insertion number, x) entries, so the
+    items themselves are never compared.
     Also supports dict-like lookup."""
 
-    def __init__(self, order='min', f=lambda x: x):
+    def __init__(self, order='min', f=lambda x: x, tie=None, lifo=False):
         self.heap = []
         if order == 'min':
             self.f = f
@@ -733,10 +939,16 @@ class PriorityQueue:
             self.f = lambda x: -f(x)  # will be popped first
         else:
             raise ValueError("Order must be either 'min' or 'max'.")
+        self.tie = tie or (lambda x: 0)
+        self.serial = itertools.count(0, -1 if lifo else 1)
+
+    def entry(self, item):
+        """Return the heap entry for item."""
+        return self.f(item), self.tie(item), next(self.serial), item
 
     def append(self, item):
         """Insert item at its correct position."""
-        heapq.heappush(self.heap, (self.f(item), item))
+        heapq.heappush(self.heap, self.entry(item))
 
     def extend(self, items):
         """Insert each item in items at its correct position."""
@@ -747,7 +959,7 @@ class PriorityQueue:
         """Pop and return the item (with min or max f(x) value)
         depending on the order."""
         if self.heap:
-            return heapq.heappop(self.heap)[1]
+            return heapq.heappop(self.heap)[-1]
         else:
             raise Exception('Trying to pop from empty PriorityQueue.')
 
@@ -755,27 +967,143 @@ class PriorityQueue:
         """Return current capacity of PriorityQueue."""
         return len(self.heap)
 
+    def __iter__(self):
+        """Iterate over the items queued, in no particular order."""
+        return (entry[-1] for entry in self.heap)
+
     def __contains__(self, key):
         """Return True if the key is in PriorityQueue."""
-        return any([item == key for _, item in self.heap])
+        return any([item == key for item in self])
 
     def __getitem__(self, key):
         """Returns the first value associated with key in PriorityQueue.
         Raises KeyError if key is not present."""
-        for value, item in self.heap:
-            if item == key:
-                return value
+        for entry in self.heap:
+            if entry[-1] == key:
+                return entry[0]
         raise KeyError(str(key) + " is not in the priority queue")
 
     def __delitem__(self, key):
         """Delete the first occurrence of key."""
         try:
-            del self.heap[[item == key for _, item in self.heap].index(True)]
+            del self.heap[[item == key for item in self].index(True)]
         except ValueError:
             raise KeyError(str(key) + " is not in the priority queue")
         heapq.heapify(self.heap)
 
 
+class IndexedPriorityQueue(PriorityQueue):
+    """A PriorityQueue that keeps a map from each item to its slot in the heap,
+    so membership and lookup are O(1) and deletion is O(log n).
+    Items are compared with == and hashed, like the keys of a dict (a Node is
+    keyed by its state), and each item is held at most once: appending an
+    item that is already queued replaces it and moves it to its new position,
+    which is how the decrease-key operation is done."""
+
+    def __init__(self, order='min', f=lambda x: x, tie=None, lifo=False):
+        super().__init__(order, f, tie, lifo)
+        self.index = {}
+
+    def append(self, item):
+        """Insert item at its correct position, replacing an equal item if
+        one is already queued."""
+        entry = self.entry(item)
+        if item in self.index:
+            i = self.index.pop(item)
+            old = self.heap[i]
+            self.heap[i] = entry
+            self.index[item] = i
+            if entry < old:
+                self._sift_up(i)
+            else:
+                self._sift_down(i)
+        else:
+            self.heap.append(entry)
+            self.index[item] = len(self.heap) - 1
+            self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """Pop and return the item (with min or max f(x) value)
+        depending on the order."""
+        if not self.heap:
+            raise Exception('Trying to pop from empty PriorityQueue.')
+        return self._remove(0)[-1]
+
+    def __contains__(self, key):
+        """Return True if the key is in PriorityQueue."""
+        return key in self.index
+
+    def __getitem__(self, key):
+        """Returns the value associated with key in PriorityQueue.
+        Raises KeyError if key is not present."""
+        try:
+            return self.heap[self.index[key]][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+    def __delitem__(self, key):
+        """Delete key from the PriorityQueue."""
+        try:
+            i = self.index[key]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+        self._remove(i)
+
+    def prune(self, size):
+        """Keep only the size best items, dropping the rest."""
+        if len(self.heap) > size:
+            self.heap = heapq.nsmallest(size, self.heap)  # a sorted list is a heap
+            self.index = {entry[-1]: i for i, entry in enumerate(self.heap)}
+
+    def _remove(self, i):
+        """Remove and return the heap entry in slot i."""
+        heap = self.heap
+        entry = heap[i]
+        del self.index[entry[-1]]
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self.index[last[-1]] = i
+            if last < entry:
+                self._sift_up(i)
+            else:
+                self._sift_down(i)
+        return entry
+
+    def _sift_up(self, i):
+        """Move the entry in slot i towards the root until the heap is ordered."""
+        heap, index = self.heap, self.index
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not entry < heap[parent]:
+                break
+            heap[i] = heap[parent]
+            index[heap[i][-1]] = i
+            i = parent
+        heap[i] = entry
+        index[entry[-1]] = i
+
+    def _sift_down(self, i):
+        """Move the entry in slot i towards the leaves until the heap is ordered."""
+        heap, index = self.heap, self.index
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[i] = heap[child]
+            index[heap[i][-1]] = i
+            i = child
+        heap[i] = entry
+        index[entry[-1]] = i
+
+
 # ______________________________________________________________________________
 # Useful Shorthands
 